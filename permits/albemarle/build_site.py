@@ -9,8 +9,15 @@
 #     "shapely",
 # ]
 # ///
-"""Generate site/data.json and site/parcels.geojson from Albemarle plan data."""
+"""Generate site/data.json and site/parcels.geojson from Albemarle plan data.
 
+data.json is a minified summary index with one row per project. Each row's
+`detail` names a content-hashed shard under details/ holding the project's
+description and related plans, which the page fetches when the row is
+expanded.
+"""
+
+import hashlib
 import json
 from collections import defaultdict
 from datetime import datetime
@@ -30,6 +37,9 @@ SITE_DIR = BASE_PATH.parent / "site" / "albemarle"
 OUTPUT_PATH = SITE_DIR / "data.json"
 GEOJSON_PATH = SITE_DIR / "parcels.geojson"
 
+# Project fields moved out of data.json into detail shards
+DETAIL_FIELDS = ("description", "related_plans")
+
 
 def load_plans(path: Path) -> dict[str, AlbemarlePlan]:
     """Load plans from JSONL file."""
@@ -44,6 +54,49 @@ def load_plans(path: Path) -> dict[str, AlbemarlePlan]:
     return plans
 
 
+def write_detail_shard(project: dict) -> dict:
+    """Move a project's detail fields into a content-hashed shard.
+
+    Returns the project's data.json row, whose `detail` is the shard path
+    relative to SITE_DIR. Related plan numbers stay in the row so the table
+    can still search them.
+    """
+    detail = {k: project.get(k) for k in DETAIL_FIELDS}
+    data = json.dumps(detail, separators=(",", ":"))
+    name = f"details/{hashlib.sha256(data.encode()).hexdigest()[:16]}.json"
+    path = SITE_DIR / name
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(data)
+    row = {k: v for k, v in project.items() if k not in DETAIL_FIELDS}
+    row["related_plan_numbers"] = [rp["plan_number"] for rp in detail["related_plans"] or []]
+    row["detail"] = name
+    return row
+
+
+def load_previous_rows() -> list[dict]:
+    """Rows of the data.json being replaced, or none if it's missing or unreadable."""
+    try:
+        with open(OUTPUT_PATH) as f:
+            return json.load(f)["projects"]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return []
+
+
+def remove_stale_shards(rows: list[dict], previous_rows: list[dict]) -> int:
+    """Delete detail shards referenced by neither rows nor the previous build's rows.
+
+    Open pages may still expand projects from the data.json being replaced.
+    """
+    keep = {row["detail"] for row in rows + previous_rows if "detail" in row}
+    removed = 0
+    for path in (SITE_DIR / "details").glob("*.json"):
+        if f"details/{path.name}" not in keep:
+            path.unlink()
+            removed += 1
+    return removed
+
+
 def main() -> int:
     if not PLANS_JSONL.exists():
         print(f"Error: {PLANS_JSONL} not found. Run fetch_plans.py first.")
@@ -70,15 +123,21 @@ def main() -> int:
         print(f"{len(projects)} projects after overrides")
 
     OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    previous_rows = load_previous_rows()
+    rows = [write_detail_shard(project) for project in projects]
     output_data = {
         "generated_at": datetime.now().isoformat(timespec="seconds"),
-        "projects": projects,
+        "projects": rows,
     }
 
     with open(OUTPUT_PATH, "w") as f:
-        json.dump(output_data, f, indent=2)
+        json.dump(output_data, f, separators=(",", ":"))
 
-    print(f"Wrote {len(projects)} projects to {OUTPUT_PATH}")
+    size_kb = OUTPUT_PATH.stat().st_size / 1024
+    print(f"Wrote {len(projects)} projects to {OUTPUT_PATH} ({size_kb:.0f} KB)")
+    removed = remove_stale_shards(rows, previous_rows)
+    if removed:
+        print(f"Removed {removed} stale detail shards")
 
     # Summary stats
     with_units = [p for p in projects if p.get("units")]
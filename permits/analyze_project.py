@@ -10,98 +10,34 @@
 """Generate detailed project reports from fetched permit data."""
 
 import argparse
-import json
+import functools
 from collections import defaultdict
+from collections.abc import Mapping
 from datetime import datetime
 from pathlib import Path
 
 from dateutil import parser as date_parser
 
 from models import Permit
+from permit_graph import PermitGraph, load_graph
+from permit_store import PermitStore
+from permit_utils import load_parcel_zones
+from permit_utils import parse_date as parse_us_date
 
 
-def load_permits(jsonl_path: Path) -> dict[str, Permit]:
-    """Load permits from JSONL file, deduplicating by permit_id."""
-    permits = {}
-    with open(jsonl_path) as f:
-        for line in f:
-            data = json.loads(line)
-            permit = Permit.model_validate(data)
-            permits[permit.permit_id] = permit
-    return permits
-
-
-def load_parcel_zones(parcels_path: Path) -> dict[str, str]:
-    """Load parcel number to zone mapping."""
-    if not parcels_path.exists():
-        return {}
-    with open(parcels_path) as f:
-        return json.load(f)
-
-
-def find_permits_by_address(permits: dict[str, Permit], address: str) -> list[Permit]:
-    """Find all permits matching an address (case-insensitive partial match)."""
-    address_lower = address.lower()
-    matches = []
-    for permit in permits.values():
-        for addr in permit.site_addresses:
-            if address_lower in addr.address.lower():
-                matches.append(permit)
-                break
-    return matches
-
-
-def build_relationship_graph(permits: dict[str, Permit]) -> tuple[dict, dict]:
-    """Build parent->children and child->parents mappings."""
-    children_map = defaultdict(set)
-    parents_map = defaultdict(set)
-
-    for permit in permits.values():
-        pid = permit.permit_id
-        for parent in permit.parent_cases:
-            children_map[parent.permit_id].add(pid)
-            parents_map[pid].add(parent.permit_id)
-        for child in permit.child_cases:
-            children_map[pid].add(child.permit_id)
-            parents_map[child.permit_id].add(pid)
-
-    return dict(children_map), dict(parents_map)
-
-
-def find_all_related(
-    start_ids: set[str],
-    permits: dict[str, Permit],
-    children_map: dict,
-    parents_map: dict,
-) -> set[str]:
-    """Find all permits related to the starting set via parent/child relationships."""
-    visited = set()
-    queue = list(start_ids)
-
-    while queue:
-        pid = queue.pop()
-        if pid in visited:
-            continue
-        visited.add(pid)
-
-        for child_id in children_map.get(pid, []):
-            if child_id not in visited and child_id in permits:
-                queue.append(child_id)
-
-        for parent_id in parents_map.get(pid, []):
-            if parent_id not in visited and parent_id in permits:
-                queue.append(parent_id)
-
-    return visited
-
-
+@functools.lru_cache(maxsize=1 << 16)
 def parse_date(date_str: str | None) -> datetime | None:
-    """Parse a date string, returning None if invalid."""
-    if not date_str:
-        return None
+    """Parse a date string, returning None if invalid.
+
+    MM/DD/YYYY dates take the fast strptime path; anything else falls back
+    to dateutil's loose parsing.
+    """
+    dt = parse_us_date(date_str)
+    if dt is not None or not date_str:
+        return dt
     try:
         return date_parser.parse(date_str)
-    except (ValueError, TypeError):
+    except (ValueError, TypeError, OverflowError):
         return None
 
 
@@ -118,17 +54,6 @@ def get_permit_sort_key(permit: Permit) -> tuple:
     return (dt or datetime.min, permit.permit_id)
 
 
-def normalize_permit_id(pid: str, permits: dict[str, Permit]) -> str | None:
-    """Normalize permit ID to match keys in permits dict."""
-    if pid in permits:
-        return pid
-    if pid + ".00" in permits:
-        return pid + ".00"
-    if pid.endswith(".00") and pid[:-3] in permits:
-        return pid[:-3]
-    return None
-
-
 def get_intake_date(permit: Permit) -> str | None:
     """Get intake application date from tasks."""
     for task in permit.tasks:
@@ -139,25 +64,15 @@ def get_intake_date(permit: Permit) -> str | None:
 
 def build_permit_tree(
     related_permits: list[Permit],
-    permits: dict[str, Permit],
-    children_map: dict,
-    parents_map: dict,
+    permits: Mapping[str, Permit],
+    graph: PermitGraph,
 ) -> list[str]:
     """Build a tree view of permits based on parent-child relationships."""
     lines = []
     related_ids = {p.permit_id for p in related_permits}
 
     # Find roots (permits with no parents in our set)
-    roots = []
-    for p in related_permits:
-        has_parent_in_set = False
-        for parent_id in parents_map.get(p.permit_id, []):
-            norm_id = normalize_permit_id(parent_id, permits)
-            if norm_id and norm_id in related_ids:
-                has_parent_in_set = True
-                break
-        if not has_parent_in_set:
-            roots.append(p)
+    roots = [permits[pid] for pid in graph.roots(related_ids)]
 
     # Sort roots by date
     roots.sort(key=get_permit_sort_key)
@@ -181,10 +96,9 @@ def build_permit_tree(
 
         # Find children in our related set
         children = []
-        for child_id in children_map.get(p.permit_id, []):
-            norm_id = normalize_permit_id(child_id, permits)
-            if norm_id and norm_id in related_ids and norm_id not in visited:
-                children.append(permits[norm_id])
+        for child_id in graph.children.get(p.permit_id, set()):
+            if child_id in related_ids and child_id not in visited:
+                children.append(permits[child_id])
 
         children.sort(key=get_permit_sort_key)
         for child in children:
@@ -197,17 +111,30 @@ def build_permit_tree(
     return lines
 
 
+def find_permits(permits: PermitStore, address: str) -> list[Permit]:
+    """Permits whose site address matches address.
+
+    Whole words are matched first, with the last word allowed to be a prefix
+    ('5TH ST' finds '5TH ST SW' but not '15TH ST'). If that finds nothing,
+    fall back to a case-insensitive substring match, so partial mid-word
+    queries ('AIN ST') still find something.
+    """
+    matches = permits.find_by_address(address, prefix=True)
+    if not matches:
+        matches = [permits[pid] for pid in permits.find_ids_by_address_substring(address)]
+    return matches
+
+
 def generate_report(
-    address: str, permits: dict[str, Permit], parcel_zones: dict[str, str]
+    address: str, permits: PermitStore, parcel_zones: dict[str, str]
 ) -> str:
     """Generate a detailed project report for an address."""
-    matches = find_permits_by_address(permits, address)
+    matches = find_permits(permits, address)
     if not matches:
         return f"No permits found matching '{address}'"
 
-    children_map, parents_map = build_relationship_graph(permits)
-    start_ids = {p.permit_id for p in matches}
-    all_related_ids = find_all_related(start_ids, permits, children_map, parents_map)
+    graph = load_graph(permits.jsonl_path, permits)
+    all_related_ids = set().union(*(graph.related(p.permit_id) for p in matches))
 
     related_permits = [permits[pid] for pid in all_related_ids if pid in permits]
     related_permits.sort(key=get_permit_sort_key)
@@ -259,7 +186,7 @@ def generate_report(
     # Permit tree
     lines.append("## Permit Tree")
     lines.append("```")
-    tree_lines = build_permit_tree(related_permits, permits, children_map, parents_map)
+    tree_lines = build_permit_tree(related_permits, permits, graph)
     lines.extend(tree_lines)
     lines.append("```")
     lines.append("")
@@ -306,7 +233,13 @@ def main():
     parser = argparse.ArgumentParser(
         description="Generate project reports from permit data"
     )
-    parser.add_argument("address", help="Address to search for (partial match)")
+    parser.add_argument(
+        "address",
+        help=(
+            "Address to search for (matches whole words, the last word may be a prefix;"
+            " falls back to a substring match)"
+        ),
+    )
     parser.add_argument(
         "--data",
         type=Path,
@@ -331,7 +264,7 @@ def main():
         print(f"Error: Data file not found: {args.data}")
         return 1
 
-    permits = load_permits(args.data)
+    permits = PermitStore(args.data)
     parcel_zones = load_parcel_zones(args.parcels)
     report = generate_report(args.address, permits, parcel_zones)
 
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "orjson",
+#     "pydantic",
+# ]
+# ///
+"""Benchmark permit loading strategies, reported as seconds per 10k permits."""
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Callable
+
+from models import Permit
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def read_lines(path: Path, limit: int | None) -> list[bytes]:
+    lines = []
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                lines.append(line)
+                if limit and len(lines) >= limit:
+                    break
+    return lines
+
+
+def bench(fn: Callable[[list[bytes]], object], lines: list[bytes], repeat: int) -> float:
+    """Best-of-repeat seconds per 10k lines."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(lines)
+        best = min(best, time.perf_counter() - start)
+    return best / len(lines) * 10_000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark permit loading")
+    parser.add_argument(
+        "--data",
+        type=Path,
+        default=Path(__file__).parent / "permits.jsonl",
+        help="Path to permits.jsonl file",
+    )
+    parser.add_argument("--limit", type=int, help="Only use the first N permits")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per strategy (best is kept)")
+    args = parser.parse_args()
+
+    if not args.data.exists():
+        print(f"Error: Data file not found: {args.data}")
+        return 1
+
+    lines = read_lines(args.data, args.limit)
+    print(f"{len(lines)} permits from {args.data}\n")
+
+    strategies: dict[str, Callable[[list[bytes]], object]] = {
+        "full: json.loads + model_validate": lambda ls: [
+            Permit.model_validate(json.loads(line)) for line in ls
+        ],
+        "full: model_validate_json": lambda ls: [
+            Permit.model_validate_json(line) for line in ls
+        ],
+        "id scan: json.loads": lambda ls: [json.loads(line)["permit_id"] for line in ls],
+    }
+    if orjson is not None:
+        strategies["full: orjson.loads + model_validate"] = lambda ls: [
+            Permit.model_validate(orjson.loads(line)) for line in ls
+        ]
+        strategies["id scan: orjson.loads"] = lambda ls: [
+            orjson.loads(line)["permit_id"] for line in ls
+        ]
+    else:
+        print("orjson not installed; skipping orjson strategies\n")
+
+    width = max(len(name) for name in strategies)
+    for name, fn in strategies.items():
+        print(f"{name:<{width}}  {bench(fn, lines, args.repeat):8.3f} s / 10k permits")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,87 @@
+"""Build manifest for skipping unchanged work in build_site.py.
+
+The manifest records a fingerprint (size, mtime and SHA-256) for each input
+file, the build code and each output, plus a content hash per project. A
+file is only re-hashed when its size or mtime changes, so checking an
+unchanged build costs a few stat calls.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+MANIFEST_VERSION = 1
+
+
+def load_manifest(path: Path) -> dict[str, Any]:
+    """Return the saved manifest, or an empty one if missing or outdated."""
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return manifest if manifest.get("version") == MANIFEST_VERSION else {}
+
+
+def save_manifest(path: Path, manifest: dict[str, Any]) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump({"version": MANIFEST_VERSION, **manifest}, f, indent=1)
+    os.replace(tmp, path)
+
+
+def file_fingerprint(path: Path, previous: dict[str, Any] | None = None) -> dict[str, Any] | None:
+    """Size, mtime and SHA-256 of path (None if missing).
+
+    The hash from `previous` is reused when size and mtime are unchanged.
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if previous and all(previous.get(k) == v for k, v in fingerprint.items()):
+        return previous
+    with open(path, "rb") as f:
+        fingerprint["sha256"] = hashlib.file_digest(f, "sha256").hexdigest()
+    return fingerprint
+
+
+def files_fingerprint(
+    paths: dict[str, Path], previous: dict[str, Any] | None = None
+) -> dict[str, dict[str, Any] | None]:
+    """file_fingerprint for each named path."""
+    previous = previous or {}
+    return {name: file_fingerprint(path, previous.get(name)) for name, path in paths.items()}
+
+
+def same_contents(a: dict[str, Any] | None, b: dict[str, Any] | None) -> bool:
+    """Whether two fingerprint sets describe the same file contents."""
+    def hashes(fingerprints: dict[str, Any] | None) -> dict[str, str | None] | None:
+        if fingerprints is None:
+            return None
+        return {name: fp and fp["sha256"] for name, fp in fingerprints.items()}
+
+    return hashes(a) == hashes(b)
+
+
+def content_hash(value: Any) -> str:
+    """SHA-256 of a JSON-serializable value (datetimes are stringified)."""
+    data = json.dumps(value, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def write_if_changed(path: Path, text: str) -> bool:
+    """Write text to path unless it already holds exactly that text."""
+    data = text.encode()
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return True
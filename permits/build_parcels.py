@@ -2,7 +2,8 @@
 
 Reads raw GeoJSON from fetch_parcels.py (layer 72 — already in EPSG:4326),
 filters to parcels with matching project PINs, simplifies geometry, and
-attaches project metadata to each feature.
+attaches project metadata to each feature. Simplified geometry from a
+previous build can be passed in to skip re-reading the raw file.
 """
 
 import json
@@ -32,18 +33,22 @@ _STATUS_PRIORITY = {
 }
 
 
-def _make_feature(
-    pin: str,
-    geom: shapely.geometry.base.BaseGeometry,
-    projects: list[dict[str, Any]],
-) -> dict:
-    """Simplify geometry and wrap a parcel into a GeoJSON feature.
+def _simplify(geom: shapely.geometry.base.BaseGeometry) -> dict:
+    """Simplify a parcel geometry and return it as a GeoJSON mapping.
 
     The input geometry is already in EPSG:4326 (no reprojection needed).
     """
     # ~5m simplification to reduce file size (same tolerance as Albemarle)
     geom = geom.simplify(0.00005, preserve_topology=True)
+    return shapely.geometry.mapping(geom)
 
+
+def _make_feature(
+    pin: str,
+    geometry: dict,
+    projects: list[dict[str, Any]],
+) -> dict:
+    """Wrap a simplified parcel geometry into a GeoJSON feature."""
     project_list = [
         {
             "plan_id": p["permit_id"],
@@ -69,7 +74,7 @@ def _make_feature(
 
     return {
         "type": "Feature",
-        "geometry": shapely.geometry.mapping(geom),
+        "geometry": geometry,
         "properties": {
             "pin": pin,
             "status": best_status,
@@ -81,35 +86,53 @@ def _make_feature(
 def build_parcels(
     geojson_path: Path,
     pin_to_projects: dict[str, list[dict[str, Any]]],
+    cached_geometry: dict[str, list[dict]] | None = None,
 ) -> dict:
     """Read raw GeoJSON, filter to matched PINs, simplify, and annotate.
 
     Args:
         geojson_path: Path to raw parcels_geo.geojson from fetch_parcels.py
         pin_to_projects: Mapping of ParcelNumber -> list of project dicts
+        cached_geometry: Simplified geometries by PIN from a previous build
+            of the same raw file, in file order (empty = PIN not in the
+            file). The raw file is only read if some PIN isn't cached.
 
     Returns:
         GeoJSON FeatureCollection dict
     """
-    with open(geojson_path) as f:
-        raw = json.load(f)
-
-    features: list[dict] = []
-    matched_pins: set[str] = set()
-
-    for feature in raw.get("features", []):
-        props = feature.get("properties", {})
-        pin = props.get("ParcelNumber", "")
-        if pin not in pin_to_projects:
-            continue
-
-        geom = shapely.geometry.shape(feature["geometry"])
-        features.append(_make_feature(pin, geom, pin_to_projects[pin]))
-        matched_pins.add(pin)
+    cached_geometry = cached_geometry or {}
+    geometries: dict[str, list[dict]] = {}
+
+    if all(pin in cached_geometry for pin in pin_to_projects):
+        for pin, cached in cached_geometry.items():
+            if cached and pin in pin_to_projects:
+                geometries[pin] = cached
+    else:
+        with open(geojson_path) as f:
+            raw = json.load(f)
+        simplified: dict[str, list[dict]] = {}
+        for feature in raw.get("features", []):
+            props = feature.get("properties", {})
+            pin = props.get("ParcelNumber", "")
+            if pin not in pin_to_projects:
+                continue
+            if pin in cached_geometry:
+                geometries[pin] = cached_geometry[pin]
+                continue
+            simplified.setdefault(pin, []).append(
+                _simplify(shapely.geometry.shape(feature["geometry"]))
+            )
+            geometries[pin] = simplified[pin]
+
+    features = [
+        _make_feature(pin, geometry, pin_to_projects[pin])
+        for pin, pin_geometries in geometries.items()
+        for geometry in pin_geometries
+    ]
 
-    unmatched = set(pin_to_projects.keys()) - matched_pins
+    unmatched = set(pin_to_projects.keys()) - geometries.keys()
     multi = sum(1 for f in features if len(f["properties"]["projects"]) > 1)
-    print(f"  Matched {len(matched_pins)} PINs, {len(unmatched)} unmatched")
+    print(f"  Matched {len(geometries)} PINs, {len(unmatched)} unmatched")
     print(f"  {len(features)} features ({multi} with multiple projects)")
 
     return {"type": "FeatureCollection", "features": features}
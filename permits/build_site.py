@@ -7,37 +7,54 @@
 #     "shapely",
 # ]
 # ///
-"""Generate site/cville/data.json and parcels.geojson from permit data."""
-
+"""Generate site/cville/data.json and parcels.geojson from permit data.
+
+data.json is a minified summary index with one row per project. Each
+row's `detail` names a content-hashed shard under details/ holding the
+project's permit tree, which the page fetches when the row is expanded.
+
+Builds are incremental: build_manifest.json records fingerprints of the
+inputs, the build code and the outputs. If none changed the build exits
+immediately. Otherwise projects whose fingerprint is unchanged reuse their
+serialized output, parcel geometry is reused from the previous
+parcels.geojson, and outputs are only rewritten when their content changes.
+Use --force to rebuild from scratch.
+"""
+
+import argparse
+import hashlib
 import json
 from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
 
+from build_manifest import (
+    content_hash,
+    files_fingerprint,
+    load_manifest,
+    same_contents,
+    save_manifest,
+    write_if_changed,
+)
 from models import Permit
-from permit_utils import load_permits, load_parcel_zones, normalize_permit_id
+from permit_graph import PermitGraph, load_graph
+from permit_utils import load_permits, load_parcel_zones, parse_date
 from top_developments import find_developments, load_overrides, apply_overrides
 
+# Serialized project fields moved out of data.json into detail shards
+DETAIL_FIELDS = ("permit_tree",)
 
-def build_relationship_graph(permits: dict[str, Permit]) -> tuple[dict, dict]:
-    """Build parent->children and child->parents mappings."""
-    children_map: dict[str, set[str]] = defaultdict(set)
-    parents_map: dict[str, set[str]] = defaultdict(set)
-
-    for permit in permits.values():
-        pid = permit.permit_id
-        for parent in permit.parent_cases:
-            norm = normalize_permit_id(parent.permit_id, permits)
-            if norm:
-                children_map[norm].add(pid)
-                parents_map[pid].add(norm)
-        for child in permit.child_cases:
-            norm = normalize_permit_id(child.permit_id, permits)
-            if norm:
-                children_map[pid].add(norm)
-                parents_map[norm].add(pid)
-
-    return dict(children_map), dict(parents_map)
+# Modules whose changes invalidate the build manifest
+BUILD_SOURCES = [
+    "build_site.py",
+    "build_parcels.py",
+    "build_manifest.py",
+    "top_developments.py",
+    "permit_utils.py",
+    "permit_graph.py",
+    "permit_store.py",
+    "models.py",
+]
 
 
 def get_intake_date(permit: Permit) -> str | None:
@@ -48,104 +65,131 @@ def get_intake_date(permit: Permit) -> str | None:
     return None
 
 
-def parse_date(date_str: str | None) -> datetime | None:
-    """Parse a date string in MM/DD/YYYY format."""
-    if not date_str:
-        return None
-    try:
-        return datetime.strptime(date_str.strip(), "%m/%d/%Y")
-    except ValueError:
-        return None
-
-
 def get_permit_sort_key(permit: Permit) -> tuple:
     """Sort key for permits: by date created, then by permit ID."""
     dt = parse_date(permit.search_result.date_created)
     return (dt or datetime.min, permit.permit_id)
 
 
-def build_permit_tree_json(
-    project: dict,
-    permits: dict[str, Permit],
-    children_map: dict[str, set[str]],
-    parents_map: dict[str, set[str]],
-) -> list[dict]:
-    """Build a JSON tree structure of permits for a project.
-
-    Returns a list of root permit nodes, each with nested children.
-    """
-    # Find all related permits for this project
-    from permit_utils import find_related_permits
-
-    related_ids = find_related_permits([project["permit_id"]], permits)
-    related_permits = [permits[pid] for pid in related_ids if pid in permits]
-    related_permits.sort(key=get_permit_sort_key)
-
-    if not related_permits:
-        return []
-
-    related_id_set = {p.permit_id for p in related_permits}
-
-    # Find roots (permits with no parents in our set)
-    roots = []
-    for p in related_permits:
-        has_parent_in_set = False
-        for parent_id in parents_map.get(p.permit_id, set()):
-            if parent_id in related_id_set:
-                has_parent_in_set = True
-                break
-        if not has_parent_in_set:
-            roots.append(p)
-
-    roots.sort(key=get_permit_sort_key)
-
-    def permit_to_dict(p: Permit) -> dict:
-        """Convert a permit to a JSON-serializable dict."""
-        intake = get_intake_date(p)
-        date_str = intake if intake else p.search_result.date_created
-        # Parse and format as ISO date
-        dt = parse_date(date_str)
-        iso_date = dt.strftime("%Y-%m-%d") if dt else None
-        return {
-            "permit_id": p.permit_id,
-            "permit_type": p.search_result.permit_type,
-            "sub_type": p.search_result.sub_type,
-            "status": p.search_result.status,
-            "date": iso_date,
-            "url": p.url,
-            "children": [],
-        }
-
-    def build_subtree(p: Permit, visited: set[str]) -> dict | None:
-        """Recursively build the subtree for a permit."""
-        if p.permit_id in visited:
-            return None
-        visited.add(p.permit_id)
-
-        node = permit_to_dict(p)
-
-        # Find children in our related set
-        children = []
-        for child_id in children_map.get(p.permit_id, set()):
-            if child_id in related_id_set and child_id not in visited:
-                children.append(permits[child_id])
+def permit_to_dict(p: Permit) -> dict:
+    """Convert a permit to a JSON-serializable dict (without children)."""
+    intake = get_intake_date(p)
+    date_str = intake if intake else p.search_result.date_created
+    # Parse and format as ISO date
+    dt = parse_date(date_str)
+    iso_date = dt.strftime("%Y-%m-%d") if dt else None
+    return {
+        "permit_id": p.permit_id,
+        "permit_type": p.search_result.permit_type,
+        "sub_type": p.search_result.sub_type,
+        "status": p.search_result.status,
+        "date": iso_date,
+        "url": p.url,
+    }
 
-        children.sort(key=get_permit_sort_key)
-        for child in children:
-            child_node = build_subtree(child, visited)
-            if child_node:
-                node["children"].append(child_node)
 
-        return node
+class PermitTrees:
+    """Permit trees and fingerprints, memoized per connected component.
 
-    visited: set[str] = set()
-    tree = []
-    for root in roots:
-        node = build_subtree(root, visited)
-        if node:
-            tree.append(node)
+    Projects that share a component (e.g. after parcel dedup) get the same
+    tree object; permit dicts and sort keys are computed once per permit.
+    """
 
-    return tree
+    def __init__(self, permits: dict[str, Permit], graph: PermitGraph) -> None:
+        self.permits = permits
+        self.graph = graph
+        self._trees: dict[frozenset[str], list[dict]] = {}
+        self._hashes: dict[frozenset[str], str] = {}
+        self._dicts: dict[str, dict] = {}
+        self._sort_keys: dict[str, tuple] = {}
+
+    def _sort_key(self, permit_id: str) -> tuple:
+        key = self._sort_keys.get(permit_id)
+        if key is None:
+            key = self._sort_keys[permit_id] = get_permit_sort_key(self.permits[permit_id])
+        return key
+
+    def _permit_dict(self, permit_id: str) -> dict:
+        d = self._dicts.get(permit_id)
+        if d is None:
+            d = self._dicts[permit_id] = permit_to_dict(self.permits[permit_id])
+        return d
+
+    def tree(self, permit_id: str) -> list[dict]:
+        """JSON tree of the permits related to permit_id.
+
+        Returns a list of root permit nodes, each with nested children.
+        """
+        component = self.graph.related(permit_id)
+        tree = self._trees.get(component)
+        if tree is None:
+            tree = self._trees[component] = self._build_tree(component)
+        return tree
+
+    def _build_tree(self, component: frozenset[str]) -> list[dict]:
+        related_id_set = {pid for pid in component if pid in self.permits}
+        if not related_id_set:
+            return []
+
+        # Roots are permits with no parents in our set
+        roots = sorted(self.graph.roots(related_id_set), key=self._sort_key)
+
+        def build_subtree(permit_id: str, visited: set[str]) -> dict | None:
+            """Recursively build the subtree for a permit."""
+            if permit_id in visited:
+                return None
+            visited.add(permit_id)
+
+            # Find children in our related set
+            children = sorted(
+                (
+                    child_id
+                    for child_id in self.graph.children.get(permit_id, ())
+                    if child_id in related_id_set and child_id not in visited
+                ),
+                key=self._sort_key,
+            )
+            node = {**self._permit_dict(permit_id), "children": []}
+            for child_id in children:
+                child_node = build_subtree(child_id, visited)
+                if child_node:
+                    node["children"].append(child_node)
+            return node
+
+        visited: set[str] = set()
+        tree = []
+        for root in roots:
+            node = build_subtree(root, visited)
+            if node:
+                tree.append(node)
+        return tree
+
+    def fingerprint(self, permit_id: str) -> str:
+        """Hash of everything the tree for permit_id is built from."""
+        component = self.graph.related(permit_id)
+        digest = self._hashes.get(component)
+        if digest is None:
+            tree_inputs = [
+                (
+                    pid,
+                    p.search_result.permit_type,
+                    p.search_result.sub_type,
+                    p.search_result.status,
+                    p.search_result.date_created,
+                    get_intake_date(p),
+                    p.url,
+                    sorted(self.graph.children.get(pid, ())),
+                )
+                for pid in sorted(component)
+                if (p := self.permits.get(pid)) is not None
+            ]
+            digest = self._hashes[component] = content_hash(tree_inputs)
+        return digest
+
+
+def project_fingerprint(project: dict, trees: PermitTrees) -> str:
+    """Hash of everything serialize_project and the project's tree read."""
+    return content_hash([project, trees.fingerprint(project["permit_id"])])
 
 
 def serialize_project(project: dict, permit_tree: list[dict]) -> dict:
@@ -172,7 +216,75 @@ def serialize_project(project: dict, permit_tree: list[dict]) -> dict:
     }
 
 
+def write_detail_shard(project: dict, output_dir: Path) -> dict:
+    """Move a serialized project's detail fields into a content-hashed shard.
+
+    Returns the project's data.json row, whose `detail` is the shard path
+    relative to output_dir. Shards are named by their content, so existing
+    ones are never rewritten and can be cached indefinitely.
+    """
+    data = json.dumps({k: project[k] for k in DETAIL_FIELDS}, separators=(",", ":"))
+    name = f"details/{hashlib.sha256(data.encode()).hexdigest()[:16]}.json"
+    path = output_dir / name
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_if_changed(path, data)
+    row = {k: v for k, v in project.items() if k not in DETAIL_FIELDS}
+    row["detail"] = name
+    return row
+
+
+def remove_stale_shards(output_dir: Path, rows: list[dict], previous_rows: list[dict]) -> int:
+    """Delete detail shards that neither this build nor the previous one references.
+
+    Pages opened before this build still hold the previous data.json, so its
+    shards are kept for one more build rather than 404ing on expand.
+    """
+    keep = {row["detail"] for row in rows + previous_rows if "detail" in row}
+    removed = 0
+    for path in (output_dir / "details").glob("*.json"):
+        if f"details/{path.name}" not in keep:
+            path.unlink()
+            removed += 1
+    return removed
+
+
+def load_previous_projects(
+    output_path: Path, fingerprints: list[str]
+) -> tuple[list[dict], dict[str, dict]]:
+    """Previous data.json rows, and the same keyed by their fingerprint."""
+    try:
+        with open(output_path) as f:
+            projects = json.load(f)["projects"]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return [], {}
+    if len(projects) != len(fingerprints):
+        return projects, {}
+    return projects, dict(zip(fingerprints, projects))
+
+
+def load_previous_geometry(geojson_path: Path, unmatched_pins: list[str]) -> dict[str, list[dict]]:
+    """Simplified geometry by PIN from the previous parcels.geojson."""
+    try:
+        with open(geojson_path) as f:
+            features = json.load(f)["features"]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return {}
+    geometry: dict[str, list[dict]] = {}
+    for feature in features:
+        geometry.setdefault(feature["properties"]["pin"], []).append(feature["geometry"])
+    for pin in unmatched_pins:
+        geometry.setdefault(pin, [])
+    return geometry
+
+
 def main() -> int:
+    parser = argparse.ArgumentParser(description="Build the Charlottesville site data")
+    parser.add_argument(
+        "--force", action="store_true", help="Rebuild everything, ignoring build_manifest.json"
+    )
+    args = parser.parse_args()
+
     base_path = Path(__file__).parent
     permits_path = base_path / "permits.jsonl"
     parcels_path = base_path / "parcels.json"
@@ -181,20 +293,47 @@ def main() -> int:
     output_dir = base_path / "site" / "cville"
     output_path = output_dir / "data.json"
     geojson_path = output_dir / "parcels.geojson"
+    manifest_path = base_path / "build_manifest.json"
 
     if not permits_path.exists():
         print(f"Error: Data file not found: {permits_path}")
         return 1
 
+    input_paths = {
+        "permits.jsonl": permits_path,
+        "parcels.json": parcels_path,
+        "overrides.yaml": overrides_path,
+        "parcels_geo.geojson": parcels_geo_path,
+    }
+    code_paths = {name: base_path / name for name in BUILD_SOURCES}
+    output_paths = {"data.json": output_path, "parcels.geojson": geojson_path}
+
+    previous = {} if args.force else load_manifest(manifest_path)
+    inputs = files_fingerprint(input_paths, previous.get("inputs"))
+    code = files_fingerprint(code_paths, previous.get("code"))
+    if not same_contents(code, previous.get("code")):
+        previous = {}
+    elif (
+        same_contents(inputs, previous.get("inputs"))
+        and same_contents(
+            files_fingerprint(output_paths, previous.get("outputs")), previous.get("outputs")
+        )
+        and all((output_dir / name).is_file() for name in previous.get("shards", []))
+    ):
+        print("Inputs unchanged since the last build, nothing to do (use --force to rebuild)")
+        return 0
+
     print("Loading permits...")
     permits = load_permits(permits_path)
     parcel_zones = load_parcel_zones(parcels_path)
 
-    print("Building relationship graph...")
-    children_map, parents_map = build_relationship_graph(permits)
+    print("Loading relationship graph...")
+    graph = load_graph(permits_path, permits)
 
     print("Finding developments...")
-    projects = find_developments(permits, parcel_zones, min_units=None, include_without_units=True)
+    projects = find_developments(
+        permits, parcel_zones, min_units=None, include_without_units=True, graph=graph
+    )
 
     # Apply overrides if file exists
     if overrides_path.exists():
@@ -203,24 +342,43 @@ def main() -> int:
         projects = apply_overrides(projects, overrides)
 
     print(f"Processing {len(projects)} projects...")
-    serialized_projects = []
+    previous_projects, cached = load_previous_projects(
+        output_path, previous.get("projects", [])
+    )
+    trees = PermitTrees(permits, graph)
+    fingerprints = []
+    rows = []
+    reused = 0
     for project in projects:
-        permit_tree = build_permit_tree_json(project, permits, children_map, parents_map)
-        serialized = serialize_project(project, permit_tree)
-        serialized_projects.append(serialized)
-
-    output_data = {
-        "generated_at": datetime.now().isoformat(timespec="seconds"),
-        "projects": serialized_projects,
-    }
+        fingerprint = project_fingerprint(project, trees)
+        row = cached.get(fingerprint)
+        # A reused row is only valid while its shard is still on disk
+        if row is not None and (output_dir / row["detail"]).is_file():
+            reused += 1
+        else:
+            permit_tree = trees.tree(project["permit_id"])
+            row = write_detail_shard(serialize_project(project, permit_tree), output_dir)
+        fingerprints.append(fingerprint)
+        rows.append(row)
+    print(f"  {reused} unchanged, {len(projects) - reused} rebuilt")
 
     output_dir.mkdir(parents=True, exist_ok=True)
-    with open(output_path, "w") as f:
-        json.dump(output_data, f, indent=2)
-
-    print(f"Wrote {len(serialized_projects)} projects to {output_path}")
+    if rows != previous_projects or not output_path.exists():
+        output_data = {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "projects": rows,
+        }
+        write_if_changed(output_path, json.dumps(output_data, separators=(",", ":")))
+        size_kb = output_path.stat().st_size / 1024
+        print(f"Wrote {len(rows)} projects to {output_path} ({size_kb:.0f} KB)")
+    else:
+        print(f"{output_path} unchanged")
+    removed = remove_stale_shards(output_dir, rows, previous_projects)
+    if removed:
+        print(f"Removed {removed} stale detail shards")
 
     # Build parcel GeoJSON if geometry file is available
+    unmatched_pins: list[str] = []
     if parcels_geo_path.exists():
         from build_parcels import build_parcels
 
@@ -230,14 +388,33 @@ def main() -> int:
             for pin in project.get("parcels", []):
                 pin_to_projects[pin].append(project)
 
-        geojson = build_parcels(parcels_geo_path, dict(pin_to_projects))
-        with open(geojson_path, "w") as f:
-            json.dump(geojson, f)
-        size_kb = geojson_path.stat().st_size / 1024
-        print(f"Wrote {geojson_path} ({size_kb:.0f} KB)")
+        # Simplified geometry only depends on the raw geometry file
+        cached_geometry = {}
+        previous_geo = previous.get("inputs", {}).get("parcels_geo.geojson")
+        if previous_geo and previous_geo["sha256"] == inputs["parcels_geo.geojson"]["sha256"]:
+            cached_geometry = load_previous_geometry(
+                geojson_path, previous.get("unmatched_pins", [])
+            )
+
+        geojson = build_parcels(parcels_geo_path, dict(pin_to_projects), cached_geometry)
+        matched_pins = {f["properties"]["pin"] for f in geojson["features"]}
+        unmatched_pins = sorted(pin_to_projects.keys() - matched_pins)
+        if write_if_changed(geojson_path, json.dumps(geojson)):
+            size_kb = geojson_path.stat().st_size / 1024
+            print(f"Wrote {geojson_path} ({size_kb:.0f} KB)")
+        else:
+            print(f"{geojson_path} unchanged")
     else:
         print(f"Warning: {parcels_geo_path} not found, skipping parcels.geojson")
 
+    save_manifest(manifest_path, {
+        "inputs": inputs,
+        "code": code,
+        "outputs": files_fingerprint(output_paths),
+        "projects": fingerprints,
+        "shards": sorted({row["detail"] for row in rows}),
+        "unmatched_pins": unmatched_pins,
+    })
     return 0
 
 
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "shapely",
+# ]
+# ///
+"""Split a parcels.geojson into zoom-level GeoJSON tiles for map.html.
+
+Writes <output>/{z}/{x}/{y}.json for each tile zoom, plus <output>/index.json
+with the zoom levels, the non-empty tiles at each, and a properties table
+indexed by feature id. Tiles only hold feature ids and geometry, so the map
+fetches the properties once and then only the geometry of visible tiles.
+
+Each tile zoom serves map zooms up to the next tile zoom, and its geometry is
+simplified to about one pixel at the deepest of those. The deepest tile zoom
+keeps the geometry as built. Features are not clipped: a feature goes into
+every tile its bounding box touches, and the map de-duplicates by id.
+
+Feature ids are positions in the source file, so tiles must be rebuilt
+whenever it changes. index.json records the source's SHA-256 and an
+up-to-date tile directory is left alone; `make build` reruns this for any
+site that has tiles.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import shutil
+from pathlib import Path
+from typing import Any
+
+import shapely.geometry
+
+DEFAULT_ZOOMS = [10, 12, 14]
+
+
+def degrees_per_pixel(zoom: int) -> float:
+    """Longitude span of one 256px-tile pixel at zoom."""
+    return 360 / (256 * 2**zoom)
+
+
+def tile_xy(lon: float, lat: float, zoom: int) -> tuple[int, int]:
+    """Web Mercator tile containing (lon, lat)."""
+    n = 2**zoom
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = int((lon + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tiles_for_bounds(bounds: tuple[float, float, float, float], zoom: int) -> list[tuple[int, int]]:
+    """All tiles at zoom touched by (west, south, east, north)."""
+    west, south, east, north = bounds
+    x0, y0 = tile_xy(west, north, zoom)
+    x1, y1 = tile_xy(east, south, zoom)
+    return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+
+def round_coords(value: Any, ndigits: int) -> Any:
+    """Round every coordinate in a GeoJSON coordinates array."""
+    if isinstance(value, (list, tuple)):
+        if value and isinstance(value[0], (int, float)):
+            return [round(c, ndigits) for c in value]
+        return [round_coords(v, ndigits) for v in value]
+    return value
+
+
+def load_index(output_dir: Path) -> dict:
+    """The index.json of an existing tile directory, or {} if there is none."""
+    try:
+        with open(output_dir / "index.json") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def build_tiles(
+    geojson: dict, output_dir: Path, zooms: list[int] = DEFAULT_ZOOMS, source_sha256: str = ""
+) -> dict[int, list[str]]:
+    """Write tiles and index.json for a FeatureCollection.
+
+    source_sha256 identifies the GeoJSON the tiles were cut from and is
+    recorded in index.json. Returns the "x/y" keys of the tiles written at
+    each zoom.
+    """
+    zooms = sorted(zooms)
+    features = geojson.get("features", [])
+    shapes = [shapely.geometry.shape(f["geometry"]) for f in features]
+
+    if (output_dir / "index.json").exists():
+        shutil.rmtree(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    tile_keys: dict[int, list[str]] = {}
+    for i, zoom in enumerate(zooms):
+        if i + 1 < len(zooms):
+            tolerance = degrees_per_pixel(zooms[i + 1] - 1)
+            ndigits = max(5, math.ceil(-math.log10(tolerance)) + 1)
+        else:
+            tolerance, ndigits = 0.0, 6
+
+        tiles: dict[tuple[int, int], list[dict]] = {}
+        for feature_id, geom in enumerate(shapes):
+            if geom.is_empty:
+                continue
+            if tolerance:
+                geom = geom.simplify(tolerance, preserve_topology=True)
+            geometry = shapely.geometry.mapping(geom)
+            tile_feature = {
+                "type": "Feature",
+                "id": feature_id,
+                "geometry": {
+                    "type": geometry["type"],
+                    "coordinates": round_coords(geometry["coordinates"], ndigits),
+                },
+            }
+            for xy in tiles_for_bounds(geom.bounds, zoom):
+                tiles.setdefault(xy, []).append(tile_feature)
+
+        for (x, y), tile_features in tiles.items():
+            path = output_dir / str(zoom) / str(x) / f"{y}.json"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w") as f:
+                json.dump({"type": "FeatureCollection", "features": tile_features}, f,
+                          separators=(",", ":"))
+        tile_keys[zoom] = sorted(f"{x}/{y}" for x, y in tiles)
+
+    index = {
+        "source_sha256": source_sha256,
+        "zooms": zooms,
+        "tiles": tile_keys,
+        "properties": [f.get("properties", {}) for f in features],
+    }
+    with open(output_dir / "index.json", "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+    return tile_keys
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Split parcels.geojson into map tiles")
+    parser.add_argument("geojson", type=Path, help="parcels.geojson written by build_site.py")
+    parser.add_argument(
+        "--output-dir",
+        "-o",
+        type=Path,
+        default=None,
+        help="Tile directory (default: parcels_tiles/ next to the input)",
+    )
+    parser.add_argument(
+        "--zooms",
+        default=",".join(map(str, DEFAULT_ZOOMS)),
+        help="Comma-separated tile zoom levels",
+    )
+    args = parser.parse_args()
+
+    if not args.geojson.exists():
+        print(f"Error: GeoJSON file not found: {args.geojson}")
+        return 1
+
+    output_dir = args.output_dir or args.geojson.with_name("parcels_tiles")
+    zooms = [int(z) for z in args.zooms.split(",") if z.strip()]
+
+    with open(args.geojson, "rb") as f:
+        data = f.read()
+    source_sha256 = hashlib.sha256(data).hexdigest()
+    index = load_index(output_dir)
+    if index.get("source_sha256") == source_sha256 and index.get("zooms") == sorted(zooms):
+        print(f"{output_dir}/ is up to date with {args.geojson}")
+        return 0
+    geojson = json.loads(data)
+
+    tile_keys = build_tiles(geojson, output_dir, zooms, source_sha256)
+    for zoom, keys in tile_keys.items():
+        print(f"  z{zoom}: {len(keys)} tiles")
+    print(f"Wrote {len(geojson.get('features', []))} features to {output_dir}/")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
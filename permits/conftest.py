@@ -0,0 +1,64 @@
+"""Shared test helpers for the permits tests."""
+
+
+def permit_record(
+    permit_id: str,
+    permit_type: str = "Site Plan",
+    sub_type: str = "Major",
+    status: str = "APPROVED",
+    address: str = "100 MAIN ST",
+    parcel: str = "100010000",
+    date: str = "01/15/2020",
+    details: list[tuple[str, str]] = (),
+    tasks: list[tuple[str, str, str]] = (),
+    payments: list[str] = (),
+    parents: list[str] = (),
+    children: list[str] = (),
+) -> dict:
+    """A permits.jsonl record as a dict, with everything not given left empty."""
+    return {
+        "permit_id": permit_id,
+        "project_number": f"PRJ{permit_id}",
+        "url": "",
+        "fetched_at": "",
+        "search_result": {
+            "permit_id": permit_id,
+            "project_number": f"PRJ{permit_id}",
+            "permit_type": permit_type,
+            "sub_type": sub_type,
+            "status": status,
+            "site_address": address,
+            "parcel_number": parcel,
+            "date_created": date,
+        },
+        "info": {
+            "permit_number": f"SP{date[-2:]}-00001",
+            "location": "",
+            "permit_type": permit_type,
+            "status": status,
+            "date_issued": None,
+            "case_type": "",
+            "case_type_id": "",
+            "sub_type_id": "",
+        },
+        "site_addresses": [{
+            "address": address, "suite": "", "city": "", "state": "", "zip": "",
+            "parcel_id": parcel,
+        }] if address else [],
+        "details": [
+            {"category": "", "description": description, "data": data}
+            for description, data in details
+        ],
+        "tasks": [
+            {"description": description, "result": result, "date_completed": completed,
+             "completed_by": ""}
+            for description, result, completed in tasks
+        ],
+        "payments": [
+            {"description": "", "fee_amount": "", "payment_amount": "", "payment_date": paid,
+             "payment_method": "", "reference": ""}
+            for paid in payments
+        ],
+        "parent_cases": [{"permit_id": pid, "project_number": ""} for pid in parents],
+        "child_cases": [{"permit_id": pid, "project_number": ""} for pid in children],
+    }
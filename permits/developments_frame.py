@@ -0,0 +1,361 @@
+"""Vectorized `find_developments` over flat permit tables (pandas).
+
+Same selection, aggregation and deduplication as
+`top_developments.find_developments`, but computed with grouped pandas
+operations over permit, detail, task, payment and site-address tables
+instead of walking `Permit` objects. The tables use the column names of
+export_parquet.py, so they can come straight from its Parquet output
+(`frames_from_parquet`) or be flattened from loaded permits
+(`frames_from_permits`).
+"""
+
+from collections.abc import Mapping
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from models import Permit
+from permit_graph import PermitGraph
+from top_developments import (
+    APPROVAL_CUTOFF,
+    FINAL_APPROVAL_RESULTS,
+    INCLUDE_WITHOUT_UNITS_SUBTYPES,
+    INCLUDE_WITHOUT_UNITS_TYPES,
+    QUALIFYING_PERMIT_TYPES,
+    QUALIFYING_PLANNING_SUBTYPES,
+    SITE_PLAN_APPROVAL_RESULTS,
+    STATUS_PRIORITY,
+    SUBMISSION_CUTOFF,
+    classify_project_type,
+)
+
+# Columns used from each table
+COLUMNS = {
+    "permits": [
+        "permit_id", "project_number", "permit_year", "permit_type", "sub_type",
+        "status", "parcel_number", "date_created",
+    ],
+    "site_addresses": ["permit_id", "address"],
+    "details": ["permit_id", "description", "data"],
+    "tasks": ["permit_id", "task_index", "description", "result", "date_completed"],
+    "payments": ["permit_id", "payment_date"],
+    "case_links": ["permit_id", "kind", "linked_permit_id"],
+}
+
+
+def frames_from_permits(permits: Mapping[str, Permit]) -> dict[str, pd.DataFrame]:
+    """Flatten permits into the tables used by find_developments_frame."""
+    rows: dict[str, list[tuple]] = {name: [] for name in COLUMNS}
+    for p in permits.values():
+        sr = p.search_result
+        rows["permits"].append((
+            p.permit_id, p.project_number, p.permit_year, sr.permit_type, sr.sub_type,
+            sr.status, sr.parcel_number, sr.date_created,
+        ))
+        rows["site_addresses"] += [(p.permit_id, a.address) for a in p.site_addresses]
+        rows["details"] += [(p.permit_id, d.description, d.data) for d in p.details]
+        rows["tasks"] += [
+            (p.permit_id, i, t.description, t.result, t.date_completed)
+            for i, t in enumerate(p.tasks)
+        ]
+        rows["payments"] += [(p.permit_id, pay.payment_date) for pay in p.payments]
+        rows["case_links"] += [(p.permit_id, "parent", c.permit_id) for c in p.parent_cases]
+        rows["case_links"] += [(p.permit_id, "child", c.permit_id) for c in p.child_cases]
+    return {
+        name: pd.DataFrame(rows[name], columns=columns) for name, columns in COLUMNS.items()
+    }
+
+
+def frames_from_parquet(parquet_dir: Path) -> dict[str, pd.DataFrame]:
+    """Read the tables written by export_parquet.py."""
+    return {
+        name: pd.read_parquet(parquet_dir / f"{name}.parquet", columns=columns)
+        for name, columns in COLUMNS.items()
+    }
+
+
+def graph_from_frames(frames: dict[str, pd.DataFrame]) -> PermitGraph:
+    """Build the relationship graph from the permits and case_links tables."""
+    permit_ids = dict.fromkeys(frames["permits"]["permit_id"])
+    links = frames["case_links"][["permit_id", "linked_permit_id", "kind"]]
+    return PermitGraph.from_links(links.itertuples(index=False, name=None), permit_ids)
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """Vectorized `permit_utils.parse_date` (MM/DD/YYYY, NaT if invalid)."""
+    return pd.to_datetime(values.str.strip(), format="%m/%d/%Y", errors="coerce")
+
+
+def _first_per_permit(df: pd.DataFrame, column: str) -> pd.Series:
+    """Value of column in the first row of df for each permit_id."""
+    return df.drop_duplicates("permit_id", keep="first").set_index("permit_id")[column]
+
+
+def _last_per_permit(df: pd.DataFrame, column: str) -> pd.Series:
+    return df.drop_duplicates("permit_id", keep="last").set_index("permit_id")[column]
+
+
+def _to_python(value: Any) -> Any:
+    """Convert pandas scalars (NaT, NaN, Timestamp) to the Python values we return."""
+    if value is None or value is pd.NaT or (isinstance(value, float) and pd.isna(value)):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value
+
+
+def permit_fields(frames: dict[str, pd.DataFrame], graph: PermitGraph) -> pd.DataFrame:
+    """Per-permit derived fields, one row per permit in file order.
+
+    Vectorized equivalents of get_unit_count, get_project_type,
+    is_qualifying_permit, get_submission_date, get_approval_date and the
+    latest task/payment date, plus the permit's graph component.
+    """
+    permits = frames["permits"].set_index("permit_id", drop=False)
+    details, tasks, payments = frames["details"], frames["tasks"], frames["payments"]
+
+    # Unit count: first matching detail with 1-999 units
+    desc = details["description"].str.lower()
+    planning_like = details["permit_id"].map(permits["permit_type"]).isin(["Site Plan", "Planning"])
+    is_units = desc.str.contains("residential units", regex=False) | (
+        (desc.eq("# of units") | desc.str.contains("number of units", regex=False))
+        & planning_like
+    )
+    digits = details["data"].str.replace(r"[^\d]", "", regex=True).str.lstrip("0")
+    valid = digits.str.len().between(1, 3)
+    unit_rows = details[is_units & valid].assign(units=digits[is_units & valid].astype(int))
+    units = _first_per_permit(unit_rows, "units")
+
+    # Project type from the last Type / Description of Work details and any
+    # non-zero commercial square footage
+    type_field = _last_per_permit(details[details["description"].eq("Type")], "data").str.lower()
+    work = _last_per_permit(
+        details[details["description"].eq("Description of Work")], "data"
+    ).str.lower()
+    data = details["data"].str.strip()
+    commercial_sf = details[
+        desc.str.contains("commercial", regex=False)
+        & (desc.str.contains("square", regex=False) | desc.str.contains("sf", regex=False))
+        & data.ne("") & data.ne("0")
+    ]["permit_id"].unique()
+    type_inputs = pd.DataFrame({
+        "type_field": type_field.reindex(permits.index),
+        "commercial": permits["permit_id"].isin(commercial_sf),
+        "description": work.reindex(permits.index).fillna(""),
+    })
+    type_inputs["type_field"] = type_inputs["type_field"].astype(object).where(
+        type_inputs["type_field"].notna(), None
+    )
+    # Classify each distinct combination once
+    combos = type_inputs.drop_duplicates()
+    combo_types = {
+        (t, c, d): classify_project_type(t, c, d)
+        for t, c, d in combos.itertuples(index=False, name=None)
+    }
+    project_type = pd.Series(
+        [combo_types[key] for key in type_inputs.itertuples(index=False, name=None)],
+        index=permits.index,
+    )
+
+    # Dates
+    task_dates = parse_dates(tasks["date_completed"])
+    payment_dates = parse_dates(payments["payment_date"])
+    intake = task_dates[tasks["description"].eq("Intake Application")].groupby(
+        tasks["permit_id"]
+    ).min()
+    first_payment = payment_dates.groupby(payments["permit_id"]).min()
+    created = parse_dates(permits["date_created"])
+    submission = pd.concat(
+        [intake.reindex(permits.index), first_payment.reindex(permits.index), created],
+        axis=1,
+    ).min(axis=1)
+    # Permit year (Jan 1 of that year) only if no other dates
+    year_start = pd.to_datetime(
+        {"year": pd.to_numeric(permits["permit_year"]), "month": 1, "day": 1}, errors="coerce"
+    )
+    submission = submission.fillna(year_start)
+
+    tasks_by_order = tasks.assign(date=task_dates).sort_values(
+        ["permit_id", "task_index"], kind="stable"
+    )
+    final = tasks_by_order[
+        tasks_by_order["description"].str.contains("Final Approval", regex=False)
+        & tasks_by_order["result"].isin(FINAL_APPROVAL_RESULTS)
+    ]
+    site_plan = tasks_by_order[
+        tasks_by_order["description"].str.contains("Final Site Plan Approved", regex=False)
+        & tasks_by_order["result"].isin(SITE_PLAN_APPROVAL_RESULTS)
+    ]
+    # The first Final Approval task decides, even if its date doesn't parse
+    approval = _first_per_permit(site_plan, "date").reindex(permits.index)
+    has_final = permits["permit_id"].isin(final["permit_id"])
+    approval = approval.where(~has_final, _first_per_permit(final, "date").reindex(permits.index))
+
+    last_activity = pd.concat(
+        [task_dates.groupby(tasks["permit_id"]).max(),
+         payment_dates.groupby(payments["permit_id"]).max()],
+        axis=1,
+    ).max(axis=1)
+
+    qualifying = permits["permit_type"].isin(QUALIFYING_PERMIT_TYPES) | (
+        permits["permit_type"].eq("Planning")
+        & permits["sub_type"].isin(QUALIFYING_PLANNING_SUBTYPES)
+    )
+
+    return permits.assign(
+        units=units.reindex(permits.index),
+        project_type=project_type,
+        qualifying=qualifying,
+        submission_date=submission,
+        approval_date=pd.to_datetime(approval),
+        last_activity=last_activity.reindex(permits.index),
+        component=permits["permit_id"].map(graph.component_of),
+        primary_address=_first_per_permit(frames["site_addresses"], "address")
+        .reindex(permits.index),
+    ).reset_index(drop=True)
+
+
+def zoning_codes(fields: pd.DataFrame) -> dict[int, tuple[str, str | None, datetime | None]]:
+    """Vectorized get_zoning_code for every component, keyed by component."""
+    qualifying = fields[fields["qualifying"]]
+
+    def earliest(column: str) -> pd.DataFrame:
+        rows = qualifying.dropna(subset=[column])
+        # Ties go to the smallest permit_id, like iterating sorted related IDs
+        rows = rows.sort_values(["component", column, "permit_id"], kind="stable")
+        return rows.drop_duplicates("component").set_index("component")[[column, "permit_id"]]
+
+    submitted = earliest("submission_date")
+    approved = earliest("approval_date")
+
+    codes: dict[int, tuple[str, str | None, datetime | None]] = {}
+    for component in fields["component"].unique():
+        sub = submitted.loc[component] if component in submitted.index else None
+        app = approved.loc[component] if component in approved.index else None
+        if sub is not None and sub["submission_date"] < SUBMISSION_CUTOFF:
+            dt = sub["submission_date"].to_pydatetime()
+            codes[component] = (
+                "2003", f"submitted {dt.strftime('%Y-%m-%d')} ({sub['permit_id']})", dt,
+            )
+        elif app is not None and app["approval_date"] < APPROVAL_CUTOFF:
+            dt = app["approval_date"].to_pydatetime()
+            codes[component] = (
+                "2003", f"approved {dt.strftime('%Y-%m-%d')} ({app['permit_id']})", dt,
+            )
+        elif sub is not None:
+            dt = sub["submission_date"].to_pydatetime()
+            codes[component] = (
+                "2023", f"submitted {dt.strftime('%Y-%m-%d')} ({sub['permit_id']})", dt,
+            )
+        else:
+            codes[component] = ("?", None, None)
+    return codes
+
+
+def find_developments_frame(
+    frames: dict[str, pd.DataFrame],
+    parcel_zones: dict[str, str],
+    min_units: int | None = None,
+    include_without_units: bool = False,
+    graph: PermitGraph | None = None,
+) -> list[dict[str, Any]]:
+    """Vectorized `top_developments.find_developments` with identical output."""
+    if graph is None:
+        graph = graph_from_frames(frames)
+    fields = permit_fields(frames, graph)
+
+    # Select candidate permits
+    has_units = fields["units"].notna()
+    selected = has_units
+    if min_units is not None:
+        selected = selected & (fields["units"] >= min_units)
+    if include_without_units:
+        selected = selected | (
+            ~has_units
+            & (
+                fields["permit_type"].isin(INCLUDE_WITHOUT_UNITS_TYPES)
+                | fields["sub_type"].isin(INCLUDE_WITHOUT_UNITS_SUBTYPES)
+            )
+            & fields["project_type"].ne("?")
+        )
+    candidates = fields[selected]
+    if candidates.empty:
+        return []
+
+    # Aggregate over each candidate's component
+    in_components = fields[fields["component"].isin(candidates["component"])]
+    by_component = in_components.groupby("component")
+    initial_submit = by_component["submission_date"].min()
+    last_updated = by_component["last_activity"].max()
+    permit_count = by_component.size()
+    parcels = (
+        in_components[in_components["parcel_number"].ne("")]
+        .groupby("component")["parcel_number"]
+        .agg(lambda s: sorted(set(s)))
+    )
+    addresses = frames["site_addresses"].assign(
+        component=frames["site_addresses"]["permit_id"].map(graph.component_of)
+    )
+    addresses = (
+        addresses[addresses["component"].isin(candidates["component"])]
+        .groupby("component")["address"]
+        .agg(set)
+    )
+    codes = zoning_codes(in_components)
+
+    projects = []
+    for row in candidates.itertuples(index=False):
+        comp_parcels = parcels.get(row.component, [])
+        zone = next((parcel_zones[p] for p in comp_parcels if p in parcel_zones), "?")
+        primary = row.primary_address if isinstance(row.primary_address, str) else None
+        others = sorted(a for a in addresses.get(row.component, set()) if a != primary)
+        zoning_code, code_reason, qualifying_date = codes[row.component]
+        projects.append({
+            "units": None if pd.isna(row.units) else int(row.units),
+            "permit_id": row.permit_id,
+            "project_number": row.project_number,
+            "use_type": row.project_type,
+            "status": row.status,
+            "addresses": ([primary] if primary else []) + others,
+            "parcels": comp_parcels,
+            "zone": zone,
+            "zoning_code": zoning_code,
+            "code_reason": code_reason,
+            "qualifying_date": qualifying_date,
+            "initial_submit": _to_python(initial_submit[row.component]),
+            "last_updated": _to_python(last_updated[row.component]),
+            "permit_count": int(permit_count[row.component]),
+        })
+
+    # Deduplicate by parcel number (preferred) or primary address, keeping the
+    # best non-VOID project by status priority, then unit count
+    table = pd.DataFrame({
+        "key": [
+            p["parcels"][0] if p["parcels"] else p["addresses"][0] if p["addresses"]
+            else p["permit_id"]
+            for p in projects
+        ],
+        "void": [p["status"] == "VOID" for p in projects],
+        "priority": [STATUS_PRIORITY.get(p["status"], 25) for p in projects],
+        "units": [p["units"] or 0 for p in projects],
+    })
+    table["order"] = range(len(table))
+    table["group_order"] = table.groupby("key", sort=False)["order"].transform("min")
+    table["all_void"] = table.groupby("key", sort=False)["void"].transform("all")
+    table = table[~table["void"] | table["all_void"]]
+    best = table.sort_values(
+        ["group_order", "priority", "units", "order"],
+        ascending=[True, False, False, True],
+        kind="stable",
+    ).drop_duplicates("key")
+    # Sort by units descending, keeping first-seen group order for ties
+    best = best.sort_values("units", ascending=False, kind="stable")
+    deduped = [projects[i] for i in best["order"]]
+
+    # Filter out projects without a complete address or parcel number
+    return [
+        p for p in deduped
+        if p["parcels"] or any(a and a[0].isdigit() for a in p["addresses"])
+    ]
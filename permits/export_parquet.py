@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "pyarrow",
+#     "pydantic",
+# ]
+# ///
+"""Export permits.jsonl to flat Parquet tables for vectorized analysis.
+
+Writes one Parquet file per table, all keyed by permit_id:
+
+    permits         one row per permit (search result + info fields)
+    tasks           one row per task, with task_index
+    task_comments   one row per task comment, keyed by (permit_id, task_index)
+    payments        one row per payment
+    details         one row per detail field
+    site_addresses  one row per site address
+    case_links      one row per parent/child case link (kind = parent|child)
+
+Date strings are kept as-is and also parsed into date32 columns (`*_date`)
+so they can be filtered and compared directly in pandas or DuckDB.
+"""
+
+import argparse
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from models import Permit
+from permit_store import PermitStore
+
+BASE_DIR = Path(__file__).parent
+
+SCHEMAS = {
+    "permits": pa.schema([
+        ("permit_id", pa.string()),
+        ("project_number", pa.string()),
+        ("url", pa.string()),
+        ("fetched_at", pa.string()),
+        ("permit_year", pa.int16()),
+        ("permit_type", pa.string()),
+        ("sub_type", pa.string()),
+        ("status", pa.string()),
+        ("site_address", pa.string()),
+        ("parcel_number", pa.string()),
+        ("date_created", pa.string()),
+        ("created_date", pa.date32()),
+        ("permit_number", pa.string()),
+        ("location", pa.string()),
+        ("case_type", pa.string()),
+        ("case_type_id", pa.string()),
+        ("sub_type_id", pa.string()),
+        ("date_issued", pa.string()),
+        ("issued_date", pa.date32()),
+    ]),
+    "tasks": pa.schema([
+        ("permit_id", pa.string()),
+        ("task_index", pa.int32()),
+        ("task_id", pa.string()),
+        ("description", pa.string()),
+        ("result", pa.string()),
+        ("date_completed", pa.string()),
+        ("completed_date", pa.date32()),
+        ("completed_by", pa.string()),
+    ]),
+    "task_comments": pa.schema([
+        ("permit_id", pa.string()),
+        ("task_index", pa.int32()),
+        ("task_id", pa.string()),
+        ("text", pa.string()),
+        ("date_created", pa.string()),
+        ("created_date", pa.date32()),
+    ]),
+    "payments": pa.schema([
+        ("permit_id", pa.string()),
+        ("description", pa.string()),
+        ("fee_amount", pa.string()),
+        ("payment_amount", pa.string()),
+        ("payment_date", pa.string()),
+        ("paid_date", pa.date32()),
+        ("payment_method", pa.string()),
+        ("reference", pa.string()),
+    ]),
+    "details": pa.schema([
+        ("permit_id", pa.string()),
+        ("category", pa.string()),
+        ("description", pa.string()),
+        ("data", pa.string()),
+    ]),
+    "site_addresses": pa.schema([
+        ("permit_id", pa.string()),
+        ("address", pa.string()),
+        ("suite", pa.string()),
+        ("city", pa.string()),
+        ("state", pa.string()),
+        ("zip", pa.string()),
+        ("parcel_id", pa.string()),
+    ]),
+    "case_links": pa.schema([
+        ("permit_id", pa.string()),
+        ("kind", pa.string()),
+        ("linked_permit_id", pa.string()),
+        ("linked_project_number", pa.string()),
+    ]),
+}
+
+
+def to_date(date_str: str | None) -> date | None:
+    """Parse the date part of an "MM/DD/YYYY[ time]" string."""
+    if not date_str or not date_str.strip():
+        return None
+    try:
+        return datetime.strptime(date_str.split()[0], "%m/%d/%Y").date()
+    except ValueError:
+        return None
+
+
+def flatten_permit(p: Permit) -> dict[str, list[dict[str, Any]]]:
+    """Flatten a permit into rows for each table."""
+    sr = p.search_result
+    rows: dict[str, list[dict[str, Any]]] = {name: [] for name in SCHEMAS}
+
+    rows["permits"].append({
+        "permit_id": p.permit_id,
+        "project_number": p.project_number,
+        "url": p.url,
+        "fetched_at": p.fetched_at,
+        "permit_year": p.permit_year,
+        "permit_type": sr.permit_type,
+        "sub_type": sr.sub_type,
+        "status": sr.status,
+        "site_address": sr.site_address,
+        "parcel_number": sr.parcel_number,
+        "date_created": sr.date_created,
+        "created_date": to_date(sr.date_created),
+        "permit_number": p.info.permit_number,
+        "location": p.info.location,
+        "case_type": p.info.case_type,
+        "case_type_id": p.info.case_type_id,
+        "sub_type_id": p.info.sub_type_id,
+        "date_issued": p.info.date_issued,
+        "issued_date": to_date(p.info.date_issued),
+    })
+
+    for i, task in enumerate(p.tasks):
+        rows["tasks"].append({
+            "permit_id": p.permit_id,
+            "task_index": i,
+            "task_id": task.task_id,
+            "description": task.description,
+            "result": task.result,
+            "date_completed": task.date_completed,
+            "completed_date": to_date(task.date_completed),
+            "completed_by": task.completed_by,
+        })
+        for comment in task.comments:
+            rows["task_comments"].append({
+                "permit_id": p.permit_id,
+                "task_index": i,
+                "task_id": task.task_id,
+                "text": comment.text,
+                "date_created": comment.date_created,
+                "created_date": to_date(comment.date_created),
+            })
+
+    for payment in p.payments:
+        rows["payments"].append({
+            "permit_id": p.permit_id,
+            **payment.model_dump(),
+            "paid_date": to_date(payment.payment_date),
+        })
+    for detail in p.details:
+        rows["details"].append({"permit_id": p.permit_id, **detail.model_dump()})
+    for addr in p.site_addresses:
+        rows["site_addresses"].append({"permit_id": p.permit_id, **addr.model_dump()})
+    for kind, cases in (("parent", p.parent_cases), ("child", p.child_cases)):
+        for case in cases:
+            rows["case_links"].append({
+                "permit_id": p.permit_id,
+                "kind": kind,
+                "linked_permit_id": case.permit_id,
+                "linked_project_number": case.project_number,
+            })
+
+    return rows
+
+
+def export_parquet(
+    permits_path: Path, output_dir: Path, batch_size: int = 5000
+) -> dict[str, int]:
+    """Write one Parquet file per table, returning row counts."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    writers = {
+        name: pq.ParquetWriter(output_dir / f"{name}.parquet", schema, compression="zstd")
+        for name, schema in SCHEMAS.items()
+    }
+    buffers: dict[str, list[dict[str, Any]]] = {name: [] for name in SCHEMAS}
+    counts = dict.fromkeys(SCHEMAS, 0)
+
+    def flush() -> None:
+        for name, rows in buffers.items():
+            if rows:
+                writers[name].write_table(pa.Table.from_pylist(rows, schema=SCHEMAS[name]))
+                counts[name] += len(rows)
+                rows.clear()
+
+    try:
+        with PermitStore(permits_path) as store:
+            for i, permit in enumerate(store.values(), 1):
+                for name, rows in flatten_permit(permit).items():
+                    buffers[name].extend(rows)
+                if i % batch_size == 0:
+                    flush()
+        flush()
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return counts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export permits to Parquet tables")
+    parser.add_argument(
+        "--data",
+        type=Path,
+        default=BASE_DIR / "permits.jsonl",
+        help="Path to permits.jsonl file",
+    )
+    parser.add_argument(
+        "--output-dir",
+        "-o",
+        type=Path,
+        default=BASE_DIR / "parquet",
+        help="Directory to write Parquet files",
+    )
+    args = parser.parse_args()
+
+    if not args.data.exists():
+        print(f"Error: Data file not found: {args.data}")
+        return 1
+
+    counts = export_parquet(args.data, args.output_dir)
+    for name, count in counts.items():
+        size = (args.output_dir / f"{name}.parquet").stat().st_size
+        print(f"{name}: {count} rows, {size / 1024:.0f} KiB")
+    print(f"Wrote Parquet tables to {args.output_dir}/")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
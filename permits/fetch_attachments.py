@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "httpx[http2]",
+#     "lxml",
+#     "pydantic",
+#     "python-dotenv",
+#     "tenacity",
+#     "tqdm",
+# ]
+# ///
+"""Download permit attachments from the Charlottesville permits portal.
+
+Attachments are streamed to a content-addressed store
+(objects/<sha256[:2]>/<sha256><ext>), deduplicated by URL and by hash.
+Partial downloads are resumed with HTTP range requests. manifest.jsonl maps
+each permit_id and download URL to its local file.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import urljoin
+
+import httpx
+from dotenv import load_dotenv
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception
+from tqdm import tqdm
+
+from fetch_permits import (
+    HEADERS, PERMIT_URL, PortalSession, SessionExpired, is_login_page, is_transient_error,
+)
+from jsonl_writer import JsonlWriter, recover_jsonl
+from models import Attachment, Permit
+from rate_limiter import RateLimiter
+
+BASE_DIR = Path(__file__).parent
+
+CHUNK_SIZE = 1 << 16
+
+
+def load_attachments(permits_path: Path) -> dict[str, list[tuple[str, Attachment]]]:
+    """Map each absolute download URL to the (permit_id, attachment) pairs using it."""
+    by_url: dict[str, list[tuple[str, Attachment]]] = defaultdict(list)
+    with open(permits_path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            permit = Permit.model_validate_json(line)
+            for attachment in permit.attachments:
+                if attachment.download_url:
+                    # Links are relative to the permit page they appear on
+                    url = urljoin(PERMIT_URL, attachment.download_url)
+                    by_url[url].append((permit.permit_id, attachment))
+    return dict(by_url)
+
+
+def load_manifest_urls(manifest_path: Path) -> set[str]:
+    if not manifest_path.exists():
+        return set()
+    with open(manifest_path) as f:
+        return {json.loads(line)["download_url"] for line in f if line.strip()}
+
+
+class UnexpectedPage(Exception):
+    """The portal answered an attachment download with an HTML page."""
+
+
+def is_transient_download_error(exc: BaseException) -> bool:
+    # A connection dropped mid-stream is the usual reason to resume a download
+    return is_transient_error(exc) or isinstance(exc, (httpx.RemoteProtocolError, UnexpectedPage))
+
+
+def content_range_total(resp: httpx.Response) -> int | None:
+    """The complete length N from a `Content-Range: bytes */N` header, if known."""
+    total = resp.headers.get("content-range", "").rpartition("/")[2]
+    return int(total) if total.isdigit() else None
+
+
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=1, max=10),
+    retry=retry_if_exception(is_transient_download_error),
+    reraise=True,
+)
+async def download(
+    session: PortalSession, url: str, part_path: Path, expect_html: bool = False
+) -> str:
+    """Stream url into part_path, resuming a partial download. Returns the SHA-256.
+
+    An HTML response is only accepted as the attachment when expect_html is
+    set. Otherwise a login page triggers one re-login, and any other page
+    (an error or "not found" page) raises UnexpectedPage.
+    """
+    relogged_in = False
+    while True:
+        generation = session.generation
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        async with session.client.stream("GET", url, headers=headers) as resp:
+            if resp.status_code == 416 and offset:
+                # Range starts at or past the end of the file
+                if content_range_total(resp) == offset:
+                    with open(part_path, "rb") as f:
+                        return hashlib.file_digest(f, "sha256").hexdigest()
+                # The part file doesn't match the remote file: start over
+                part_path.unlink()
+                continue
+            resp.raise_for_status()
+
+            if "text/html" in resp.headers.get("content-type", ""):
+                body = await resp.aread()
+                if is_login_page(body):
+                    if not relogged_in:
+                        relogged_in = True
+                        await session.relogin(generation)
+                        continue
+                    raise SessionExpired(f"Portal session expired downloading {url}")
+                if not expect_html:
+                    raise UnexpectedPage(f"Got an HTML page instead of the attachment at {url}")
+                chunks = [body]
+            else:
+                chunks = None
+
+            if resp.status_code != 206:
+                offset = 0  # Server ignored the range; start over
+            if offset:
+                # Resuming: hash what we already have, then keep appending
+                with open(part_path, "rb") as f:
+                    digest = hashlib.file_digest(f, "sha256")
+            else:
+                digest = hashlib.sha256()
+
+            with open(part_path, "ab" if offset else "wb") as f:
+                if chunks is not None:
+                    for chunk in chunks:
+                        f.write(chunk)
+                        digest.update(chunk)
+                else:
+                    async for chunk in resp.aiter_bytes(CHUNK_SIZE):
+                        f.write(chunk)
+                        digest.update(chunk)
+            return digest.hexdigest()
+
+
+def store_object(objects_dir: Path, part_path: Path, sha256: str, suffix: str) -> Path:
+    """Move a finished download into the content-addressed store."""
+    path = objects_dir / sha256[:2] / f"{sha256}{suffix}"
+    if path.exists():
+        part_path.unlink()  # Same content already downloaded from another URL
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        part_path.replace(path)
+    return path
+
+
+async def main(
+    permits_path: Path,
+    output_dir: Path,
+    concurrency: int,
+    rate: float,
+    burst: int,
+) -> int:
+    load_dotenv()
+    username = os.environ["PERMITS_USERNAME"]
+    password = os.environ["PERMITS_PASSWORD"]
+
+    objects_dir = output_dir / "objects"
+    partial_dir = output_dir / "partial"
+    manifest_path = output_dir / "manifest.jsonl"
+    partial_dir.mkdir(parents=True, exist_ok=True)
+
+    by_url = load_attachments(permits_path)
+    recover_jsonl(manifest_path)
+    done_urls = load_manifest_urls(manifest_path)
+    to_download = [url for url in by_url if url not in done_urls]
+    print(f"Found {len(by_url)} unique attachment URLs, {len(to_download)} to download")
+    if not to_download:
+        return 0
+
+    queue: asyncio.Queue[str] = asyncio.Queue()
+    for url in to_download:
+        queue.put_nowait(url)
+    failed: list[tuple[str, str]] = []
+
+    async with httpx.AsyncClient(
+        timeout=httpx.Timeout(60, read=300),
+        headers=HEADERS,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=concurrency),
+    ) as client:
+        if rate > 0:
+            RateLimiter(rate, burst).install(client)
+        session = PortalSession(client, username, password)
+        await session.login()
+        print("Logged in successfully")
+
+        async def worker(manifest: JsonlWriter, progress: tqdm) -> None:
+            while not queue.empty():
+                url = queue.get_nowait()
+                part_path = partial_dir / f"{hashlib.sha256(url.encode()).hexdigest()}.part"
+                suffix = Path(by_url[url][0][1].filename).suffix.lower()
+                try:
+                    sha256 = await download(
+                        session, url, part_path, expect_html=suffix in {".html", ".htm"}
+                    )
+                except Exception as exc:
+                    # Keep the partial file so the next run resumes it
+                    failed.append((url, f"{type(exc).__name__}: {exc}"))
+                else:
+                    size = part_path.stat().st_size
+                    path = store_object(objects_dir, part_path, sha256, suffix)
+                    for permit_id, attachment in by_url[url]:
+                        manifest.write(json.dumps({
+                            "permit_id": permit_id,
+                            "download_url": url,
+                            "filename": attachment.filename,
+                            "attachment_type": attachment.attachment_type,
+                            "sha256": sha256,
+                            "size": size,
+                            "path": str(path.relative_to(output_dir)),
+                        }))
+                progress.update()
+
+        with (
+            JsonlWriter(manifest_path, batch_size=20) as manifest,
+            tqdm(total=len(to_download), desc="Downloading attachments") as progress,
+        ):
+            await asyncio.gather(*(worker(manifest, progress) for _ in range(concurrency)))
+
+    print(f"Downloaded {len(to_download) - len(failed)} attachments to {objects_dir}")
+    if failed:
+        print(f"{len(failed)} downloads failed (partial files kept for resume):")
+        for url, error in failed[:10]:
+            print(f"  {url}: {error}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download Charlottesville permit attachments")
+    parser.add_argument(
+        "--data",
+        type=Path,
+        default=BASE_DIR / "permits.jsonl",
+        help="Path to permits.jsonl file",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=BASE_DIR / "attachments",
+        help="Directory for the attachment store and manifest.jsonl",
+    )
+    parser.add_argument("--concurrency", type=int, default=4, help="Max concurrent downloads")
+    parser.add_argument(
+        "--rate", type=float, default=5.0,
+        help="Max requests per second (0 to disable)",
+    )
+    parser.add_argument("--burst", type=int, default=10, help="Max burst of requests above --rate")
+    args = parser.parse_args()
+
+    exit(asyncio.run(main(args.data, args.output_dir, args.concurrency, args.rate, args.burst)))
@@ -2,7 +2,7 @@
 # /// script
 # requires-python = ">=3.12"
 # dependencies = [
-#     "httpx",
+#     "httpx[http2]",
 #     "lxml",
 #     "pydantic",
 #     "python-dotenv",
@@ -14,32 +14,64 @@
 
 import argparse
 import asyncio
+import functools
 import json
 import os
 import re
-from datetime import date, datetime, timezone
+from collections import deque
+from contextlib import closing
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
+from typing import Callable
 
 import httpx
 import lxml.html
+from lxml import etree
 from dotenv import load_dotenv
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception
+from tenacity import (
+    RetryCallState, RetryError, retry, stop_after_attempt, wait_exponential, retry_if_exception,
+)
 from tqdm import tqdm
 
+from fetch_queue import DONE, FAILED, PENDING, FetchQueue
+from fetch_stats import FetchStats
+from html_cache import HtmlCache
+from jsonl_writer import JsonlWriter, recover_jsonl
 from models import (
     SearchResult, CaseLink, PermitInfo, SiteAddress, Contact, Contractor,
     Detail, Task, TaskComment, Inspection, Condition, Flag, Fee, Payment, Attachment, Permit,
 )
+from permit_utils import json_loads
+from rate_limiter import RateLimiter
 
 BASE_URL = "https://permits.charlottesville.gov/portal"
 LOGIN_URL = BASE_URL
 SEARCH_URL = f"{BASE_URL}/SearchByLocation/Search"
 PERMIT_URL = f"{BASE_URL}/PermitInfo/Index"
 
+_CASE_LINK_RE = re.compile(r"caobjectid=(\S+)", re.IGNORECASE)
+# Markers used to tell a real permit page from the login form served on expiry
+_LOGIN_FORM_RE = re.compile(rb"name=[\"']LoginName[\"']")
+_CASE_PANEL_RE = re.compile(rb"id=[\"']casePanel[\"']")
+
 HEADERS = {"User-Agent": "cville-permits-fetcher"}
 
+HTML_CACHE_PATH = Path("html_cache.sqlite")
+# Legacy one-file-per-permit cache, read as a fallback and migrated on access
 HTML_CACHE_DIR = Path("html_cache")
 
+# Statuses of permits still moving through review (refetched by --refresh)
+OPEN_STATUSES = {
+    "APPLIED",
+    "REVIEW",
+    "RESUBMIT",
+    "COMMENTS",
+    "PLANCOMM",
+    "DEFERRED",
+    "UNDERCONST",
+}
+
 
 async def login(client: httpx.AsyncClient, username: str, password: str) -> None:
     resp = await client.post(
@@ -51,11 +83,162 @@ async def login(client: httpx.AsyncClient, username: str, password: str) -> None
         raise RuntimeError(f"Login failed with status {resp.status_code}: {resp.text[:500]}")
 
 
-async def search_permits(
-    client: httpx.AsyncClient, start_date: date, end_date: date
+class SessionExpired(Exception):
+    """The portal kept serving its login form after re-authenticating."""
+
+
+class PortalSession:
+    """A logged-in client whose session can be renewed mid-run.
+
+    Each login bumps `generation`. When several coroutines see an expired
+    session at once, only the first logs in again; the rest wait on the lock,
+    see the generation has moved on, and reuse the new session.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, username: str, password: str) -> None:
+        self.client = client
+        self.username = username
+        self.password = password
+        self.generation = 0
+        self.relogins = 0
+        self._lock = asyncio.Lock()
+
+    async def login(self) -> None:
+        await login(self.client, self.username, self.password)
+        self.generation += 1
+
+    async def relogin(self, generation: int) -> None:
+        """Log in again, unless another coroutine already did since `generation`."""
+        async with self._lock:
+            if self.generation == generation:
+                await self.login()
+                self.relogins += 1
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        is_valid: Callable[[httpx.Response], bool] = lambda resp: True,
+        **kwargs,
+    ) -> httpx.Response:
+        """Send a request, re-logging in once if the session has expired.
+
+        Only the portal's login form means the session expired. Any other
+        response that fails `is_valid` (e.g. a permit page without casePanel)
+        is a problem with that page, and raises ValueError without logging in.
+        """
+        for attempt in range(2):
+            generation = self.generation
+            resp = await self.client.request(method, url, **kwargs)
+            resp.raise_for_status()
+            if not is_login_page(resp.content):
+                if not is_valid(resp):
+                    raise ValueError(f"Unexpected response from {resp.url}")
+                return resp
+            if attempt == 0:
+                await self.relogin(generation)
+        raise SessionExpired(f"Portal session expired and re-login did not help: {resp.url}")
+
+
+class ConnectionStats:
+    """Count requests and new connections via httpcore's trace extension."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.connections = 0
+        self.tls_handshakes = 0
+
+    async def trace(self, event_name: str, info: dict) -> None:
+        if event_name.endswith(".send_request_headers.started"):
+            self.requests += 1
+        elif event_name == "connection.connect_tcp.complete":
+            self.connections += 1
+        elif event_name == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+
+    async def on_request(self, request: httpx.Request) -> None:
+        request.extensions["trace"] = self.trace
+
+    def install(self, client: httpx.AsyncClient) -> None:
+        client.event_hooks["request"].append(self.on_request)
+
+    def summary(self) -> str:
+        reused = self.requests - self.connections
+        pct = 100 * reused / self.requests if self.requests else 0
+        return (
+            f"{self.requests} requests over {self.connections} connections "
+            f"({self.tls_handshakes} TLS handshakes, {pct:.0f}% reused)"
+        )
+
+
+def is_login_page(content: bytes) -> bool:
+    return _LOGIN_FORM_RE.search(content) is not None
+
+
+def is_permit_page(content: bytes) -> bool:
+    return _CASE_PANEL_RE.search(content) is not None
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    if isinstance(exc, (httpx.ReadError, httpx.ReadTimeout, httpx.ConnectTimeout)):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code >= 500:
+        return True
+    return False
+
+
+def is_transient_search_error(exc: BaseException) -> bool:
+    # Read timeouts are handled by splitting the window instead of retrying it
+    return is_transient_error(exc) and not isinstance(exc, httpx.ReadTimeout)
+
+
+def month_windows(start_date: date, end_date: date) -> list[tuple[date, date]]:
+    """Split a date range into calendar-month windows (inclusive bounds)."""
+    windows = []
+    window_start = start_date
+    while window_start <= end_date:
+        if window_start.month == 12:
+            next_month = date(window_start.year + 1, 1, 1)
+        else:
+            next_month = date(window_start.year, window_start.month + 1, 1)
+        window_end = min(next_month - timedelta(days=1), end_date)
+        windows.append((window_start, window_end))
+        window_start = next_month
+    return windows
+
+
+def load_search_checkpoint(
+    checkpoint_path: Path,
+) -> dict[tuple[date, date], list[SearchResult]]:
+    """Load search windows completed by a previous, interrupted run."""
+    if not checkpoint_path.exists():
+        return {}
+    completed = {}
+    with open(checkpoint_path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                break  # Torn final line from an interrupted write
+            window = (date.fromisoformat(entry["start"]), date.fromisoformat(entry["end"]))
+            completed[window] = [SearchResult.model_validate(r) for r in entry["results"]]
+    return completed
+
+
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=1, max=10),
+    retry=retry_if_exception(is_transient_search_error),
+    reraise=True,
+)
+async def search_window(
+    session: PortalSession, start_date: date, end_date: date
 ) -> list[SearchResult]:
-    """Returns deduplicated search results (one per permit_id)."""
-    resp = await client.get(
+    """Returns deduplicated search results (one per permit_id) for one window."""
+    resp = await session.request(
+        "GET",
         SEARCH_URL,
         params={
             "keyword": "",
@@ -63,15 +246,13 @@ async def search_permits(
             "toDateInput": end_date.strftime("%m-%d-%Y"),
         },
     )
-    resp.raise_for_status()
 
-    doc = lxml.html.fromstring(resp.content)
-    rows = doc.xpath("//table[@id='search-table']/tbody/tr")
+    rows = _SEARCH_ROWS(lxml.html.fromstring(resp.content))
 
     # Deduplicate by permit_id (search returns one row per address)
     seen: dict[str, SearchResult] = {}
     for row in rows:
-        cells = row.xpath("./td")
+        cells = _ROW_CELLS(row)
         if len(cells) < 8:
             raise ValueError(f"Expected 8 columns in search results, got {len(cells)}")
 
@@ -91,66 +272,199 @@ async def search_permits(
     return list(seen.values())
 
 
-def parse_info(doc: lxml.html.HtmlElement) -> PermitInfo:
-    panel = doc.xpath("//div[@id='casePanel']")[0]
+async def search_permits(
+    session: PortalSession,
+    start_date: date,
+    end_date: date,
+    concurrency: int = 4,
+    checkpoint_path: Path | None = None,
+) -> list[SearchResult]:
+    """Returns deduplicated search results (one per permit_id).
+
+    The range is searched in concurrent month windows. A window whose request
+    times out is split in half and retried. Each finished window is appended
+    to checkpoint_path (if given), so an interrupted search resumes where it
+    left off.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    completed = {}
+    checkpoint = None
+    if checkpoint_path:
+        # Cut a torn final line so new windows don't get appended onto it
+        recover_jsonl(checkpoint_path)
+        completed = load_search_checkpoint(checkpoint_path)
+        checkpoint = open(checkpoint_path, "a")
+
+    async def search(window_start: date, window_end: date) -> list[SearchResult]:
+        if (window_start, window_end) in completed:
+            return completed[(window_start, window_end)]
+        try:
+            async with semaphore:
+                results = await search_window(session, window_start, window_end)
+        except httpx.ReadTimeout:
+            if window_start == window_end:
+                raise
+            mid = window_start + (window_end - window_start) // 2
+            halves = await asyncio.gather(
+                search(window_start, mid), search(mid + timedelta(days=1), window_end)
+            )
+            return halves[0] + halves[1]
+
+        if checkpoint:
+            checkpoint.write(json.dumps({
+                "start": window_start.isoformat(),
+                "end": window_end.isoformat(),
+                "results": [r.model_dump() for r in results],
+            }) + "\n")
+            checkpoint.flush()
+        return results
+
+    try:
+        windows = await asyncio.gather(
+            *(search(ws, we) for ws, we in month_windows(start_date, end_date))
+        )
+    finally:
+        if checkpoint:
+            checkpoint.close()
+
+    # Merge windows in date order, keeping the first row per permit_id
+    seen: dict[str, SearchResult] = {}
+    for results in windows:
+        for result in results:
+            seen.setdefault(result.permit_id, result)
+    return list(seen.values())
+
+
+# Precompiled XPath expressions shared by the section extractors
+_SEARCH_ROWS = etree.XPath("//table[@id='search-table']/tbody/tr")
+_FIRST_TABLE = etree.XPath("(.//table)[1]")
+_TABLE_ROWS = etree.XPath(".//tbody/tr")
+_ROW_CELLS = etree.XPath("./td")
+_FIRST_TEXT = etree.XPath("string(text())")
+_LINKS = etree.XPath(".//a")
+_TASK_IDS = etree.XPath(".//a[contains(@class, 'taskId')]/@id")
+_ATTACHMENT_CARDS = etree.XPath(".//div[contains(@class, 'card')]")
+_ATTACHMENT_BADGE = etree.XPath(".//span[contains(@class, 'badge')]")
+_ATTACHMENT_FILENAME = etree.XPath(".//span[@class='text-dark']")
+_ATTACHMENT_DATE = etree.XPath(".//span[@class='small']")
+_ATTACHMENT_LINK = etree.XPath(".//a[@href]")
+
+
+class PermitPage:
+    """A permit page indexed in a single pass over the document.
+
+    Panels are indexed by div id and cards by heading text, and the case panel's
+    labeled fields and hidden inputs are collected up front. Section extractors
+    then work from their own subtree instead of searching from the root.
+    """
+
+    def __init__(self, doc: lxml.html.HtmlElement) -> None:
+        self.panels: dict[str, lxml.html.HtmlElement] = {}
+        self.headings: list[tuple[str, lxml.html.HtmlElement]] = []
+        for el in doc.iter("div", "h5"):
+            if el.tag == "div":
+                panel_id = el.get("id")
+                if panel_id and panel_id not in self.panels:
+                    self.panels[panel_id] = el
+            elif el.get("class") == "card-title mb-0":
+                self.headings.append((_FIRST_TEXT(el), el))
+
+        # Case panel fields are <p class="font-13"><strong>Label:</strong> value</p>
+        self.case_fields: list[tuple[list[str], lxml.html.HtmlElement]] = []
+        self.hidden_inputs: dict[str, str] = {}
+        case_panel = self.panels.get("casePanel")
+        if case_panel is not None:
+            for el in case_panel.iter("p", "input"):
+                if el.tag == "input":
+                    field_id, value = el.get("id"), el.get("value")
+                    if field_id and value is not None:
+                        self.hidden_inputs.setdefault(field_id, value)
+                elif el.get("class") == "font-13":
+                    labels = [_FIRST_TEXT(child) for child in el if child.tag == "strong"]
+                    if labels:
+                        self.case_fields.append((labels, el))
+
+    @property
+    def has_case_panel(self) -> bool:
+        return "casePanel" in self.panels
+
+    def case_field(self, label: str) -> lxml.html.HtmlElement | None:
+        """Find the case panel field whose label contains `label`."""
+        for labels, elem in self.case_fields:
+            if any(label in text for text in labels):
+                return elem
+        return None
+
+    def card(self, heading: str) -> lxml.html.HtmlElement | None:
+        """Find the card whose title contains `heading`."""
+        for text, elem in self.headings:
+            if heading in text:
+                return elem.getparent().getparent()
+        return None
+
+    def table_rows(self, panel_id: str) -> list[list[str]]:
+        """Extract the cell text of each row in a panel's first table."""
+        panel = self.panels.get(panel_id)
+        if panel is None:
+            return []
+        return parse_table(panel)
+
+
+def parse_table(container: lxml.html.HtmlElement) -> list[list[str]]:
+    """Generic helper to extract table rows from the first table in an element."""
+    tables = _FIRST_TABLE(container)
+    if not tables:
+        return []
+    return [
+        [td.text_content().strip() for td in _ROW_CELLS(row)]
+        for row in _TABLE_ROWS(tables[0])
+    ]
+
+
+def parse_info(page: PermitPage) -> PermitInfo:
+    if not page.has_case_panel:
+        raise ValueError("Permit page has no casePanel")
 
     def extract_field(label: str) -> str | None:
-        elems = panel.xpath(f".//p[@class='font-13'][strong[contains(text(), '{label}')]]")
-        if not elems:
+        elem = page.case_field(label)
+        if elem is None:
             return None
-        text = elems[0].text_content()
+        text = elem.text_content()
         # Extract value after the colon
         if ":" in text:
             return text.split(":", 1)[1].strip()
         return text.replace(label, "").strip()
 
-    def extract_hidden(field_id: str) -> str:
-        elems = panel.xpath(f".//input[@id='{field_id}']/@value")
-        return elems[0] if elems else ""
-
     return PermitInfo(
         permit_number=extract_field("Permit/License Number") or "",
         location=extract_field("Location") or "",
         permit_type=extract_field("Permit Type") or "",
         status=extract_field("Status") or "",
         date_issued=extract_field("Date Issued") or None,
-        case_type=extract_hidden("caseType"),
-        case_type_id=extract_hidden("caseTypeId"),
-        sub_type_id=extract_hidden("subTypeId"),
+        case_type=page.hidden_inputs.get("caseType", ""),
+        case_type_id=page.hidden_inputs.get("caseTypeId", ""),
+        sub_type_id=page.hidden_inputs.get("subTypeId", ""),
     )
 
 
-def parse_case_links(doc: lxml.html.HtmlElement, label: str) -> list[CaseLink]:
+def parse_case_links(page: PermitPage, label: str) -> list[CaseLink]:
     """Parse Parent Cases or Child Cases links."""
-    panel = doc.xpath("//div[@id='casePanel']")[0]
-    elems = panel.xpath(f".//p[@class='font-13'][strong[contains(text(), '{label}')]]")
-    if not elems:
+    elem = page.case_field(label)
+    if elem is None:
         return []
 
-    links = elems[0].xpath(".//a")
     results = []
-    for link in links:
+    for link in _LINKS(elem):
         href = link.get("href", "")
-        match = re.search(r"caobjectid=(\S+)", href, re.IGNORECASE)
+        match = _CASE_LINK_RE.search(href)
         if match:
             project_number = link.text_content().strip().rstrip("|").strip()
             results.append(CaseLink(permit_id=match.group(1), project_number=project_number))
     return results
 
 
-def parse_table_rows(
-    doc: lxml.html.HtmlElement, panel_id: str
-) -> list[list[str]]:
-    """Generic helper to extract table rows from a panel."""
-    panels = doc.xpath(f"//div[@id='{panel_id}']//table")
-    if not panels:
-        return []
-    rows = panels[0].xpath(".//tbody/tr")
-    return [[td.text_content().strip() for td in row.xpath("./td")] for row in rows]
-
-
-def parse_site_addresses(doc: lxml.html.HtmlElement) -> list[SiteAddress]:
-    rows = parse_table_rows(doc, "addressPanel")
+def parse_site_addresses(page: PermitPage) -> list[SiteAddress]:
+    rows = page.table_rows("addressPanel")
     return [
         SiteAddress(
             address=r[0] if len(r) > 0 else "",
@@ -164,27 +478,22 @@ def parse_site_addresses(doc: lxml.html.HtmlElement) -> list[SiteAddress]:
     ]
 
 
-def parse_contacts(doc: lxml.html.HtmlElement) -> list[Contact]:
-    rows = parse_table_rows(doc, "peoplePanel")
+def parse_contacts(page: PermitPage) -> list[Contact]:
+    rows = page.table_rows("peoplePanel")
     return [
         Contact(name=r[0] if len(r) > 0 else "", role=r[1] if len(r) > 1 else "")
         for r in rows
     ]
 
 
-def parse_contractors(doc: lxml.html.HtmlElement) -> list[Contractor]:
+def parse_contractors(page: PermitPage) -> list[Contractor]:
     # Contractors section doesn't have a consistent panel ID, find by heading
-    headings = doc.xpath("//h5[@class='card-title mb-0'][contains(text(), 'Contractors')]")
-    if not headings:
+    card = page.card("Contractors")
+    if card is None:
         return []
-    card = headings[0].getparent().getparent()
-    tables = card.xpath(".//table")
-    if not tables:
-        return []
-    rows = tables[0].xpath(".//tbody/tr")
+    rows = parse_table(card)
     results = []
-    for row in rows:
-        cells = [td.text_content().strip() for td in row.xpath("./td")]
+    for cells in rows:
         results.append(
             Contractor(
                 business_name=cells[0] if len(cells) > 0 else "",
@@ -196,8 +505,8 @@ def parse_contractors(doc: lxml.html.HtmlElement) -> list[Contractor]:
     return results
 
 
-def parse_details(doc: lxml.html.HtmlElement) -> list[Detail]:
-    rows = parse_table_rows(doc, "detailsPanel")
+def parse_details(page: PermitPage) -> list[Detail]:
+    rows = page.table_rows("detailsPanel")
     return [
         Detail(
             category=r[0] if len(r) > 0 else "",
@@ -208,23 +517,20 @@ def parse_details(doc: lxml.html.HtmlElement) -> list[Detail]:
     ]
 
 
-def parse_tasks(doc: lxml.html.HtmlElement) -> list[Task]:
+def parse_tasks(page: PermitPage) -> list[Task]:
     """Parse tasks, extracting task IDs from 'View Comments' links."""
-    panels = doc.xpath("//div[@id='tasksPanel']//table")
-    if not panels:
+    panel = page.panels.get("tasksPanel")
+    tables = _FIRST_TABLE(panel) if panel is not None else []
+    if not tables:
         return []
 
     tasks = []
-    rows = panels[0].xpath(".//tbody/tr")
-    for row in rows:
-        cells = row.xpath("./td")
-        cell_texts = [td.text_content().strip() for td in cells]
+    for row in _TABLE_ROWS(tables[0]):
+        cell_texts = [td.text_content().strip() for td in _ROW_CELLS(row)]
 
         # Extract task_id from the "View Comments" link if present
-        task_id = None
-        comment_links = row.xpath(".//a[contains(@class, 'taskId')]/@id")
-        if comment_links:
-            task_id = comment_links[0]
+        task_ids = _TASK_IDS(row)
+        task_id = task_ids[0] if task_ids else None
 
         tasks.append(Task(
             description=cell_texts[0] if len(cell_texts) > 0 else "",
@@ -237,8 +543,8 @@ def parse_tasks(doc: lxml.html.HtmlElement) -> list[Task]:
     return tasks
 
 
-def parse_inspections(doc: lxml.html.HtmlElement) -> list[Inspection]:
-    rows = parse_table_rows(doc, "inspectionsPanel")
+def parse_inspections(page: PermitPage) -> list[Inspection]:
+    rows = page.table_rows("inspectionsPanel")
     return [
         Inspection(
             inspection_type=r[0] if len(r) > 0 else "",
@@ -250,8 +556,8 @@ def parse_inspections(doc: lxml.html.HtmlElement) -> list[Inspection]:
     ]
 
 
-def parse_conditions(doc: lxml.html.HtmlElement) -> list[Condition]:
-    rows = parse_table_rows(doc, "conditionsPanel")
+def parse_conditions(page: PermitPage) -> list[Condition]:
+    rows = page.table_rows("conditionsPanel")
     return [
         Condition(
             description=r[0] if len(r) > 0 else "",
@@ -263,8 +569,8 @@ def parse_conditions(doc: lxml.html.HtmlElement) -> list[Condition]:
     ]
 
 
-def parse_flags(doc: lxml.html.HtmlElement) -> list[Flag]:
-    rows = parse_table_rows(doc, "flagsPanel")
+def parse_flags(page: PermitPage) -> list[Flag]:
+    rows = page.table_rows("flagsPanel")
     return [
         Flag(
             description=r[0] if len(r) > 0 else "",
@@ -275,13 +581,13 @@ def parse_flags(doc: lxml.html.HtmlElement) -> list[Flag]:
     ]
 
 
-def parse_notes(doc: lxml.html.HtmlElement) -> list[str]:
-    rows = parse_table_rows(doc, "notesPanel")
+def parse_notes(page: PermitPage) -> list[str]:
+    rows = page.table_rows("notesPanel")
     return [r[0] for r in rows if r]
 
 
-def parse_fees(doc: lxml.html.HtmlElement) -> list[Fee]:
-    rows = parse_table_rows(doc, "feesPanel")
+def parse_fees(page: PermitPage) -> list[Fee]:
+    rows = page.table_rows("feesPanel")
     return [
         Fee(
             description=r[0] if len(r) > 0 else "",
@@ -292,8 +598,8 @@ def parse_fees(doc: lxml.html.HtmlElement) -> list[Fee]:
     ]
 
 
-def parse_payments(doc: lxml.html.HtmlElement) -> list[Payment]:
-    rows = parse_table_rows(doc, "paymentsPanel")
+def parse_payments(page: PermitPage) -> list[Payment]:
+    rows = page.table_rows("paymentsPanel")
     return [
         Payment(
             description=r[0] if len(r) > 0 else "",
@@ -307,18 +613,17 @@ def parse_payments(doc: lxml.html.HtmlElement) -> list[Payment]:
     ]
 
 
-def parse_attachments(doc: lxml.html.HtmlElement) -> list[Attachment]:
-    container = doc.xpath("//div[@id='docDownloadContainer']")
-    if not container:
+def parse_attachments(page: PermitPage) -> list[Attachment]:
+    container = page.panels.get("docDownloadContainer")
+    if container is None:
         return []
 
     attachments = []
-    cards = container[0].xpath(".//div[contains(@class, 'card')]")
-    for card in cards:
-        badge = card.xpath(".//span[contains(@class, 'badge')]")
-        filename_span = card.xpath(".//span[@class='text-dark']")
-        date_span = card.xpath(".//span[@class='small']")
-        link = card.xpath(".//a[@href]")
+    for card in _ATTACHMENT_CARDS(container):
+        badge = _ATTACHMENT_BADGE(card)
+        filename_span = _ATTACHMENT_FILENAME(card)
+        date_span = _ATTACHMENT_DATE(card)
+        link = _ATTACHMENT_LINK(card)
 
         attachments.append(
             Attachment(
@@ -335,12 +640,13 @@ TASK_COMMENTS_URL = f"{BASE_URL}/PermitInfo/GetTaskComments"
 
 
 async def fetch_task_comments(
-    client: httpx.AsyncClient, task_id: str
+    session: PortalSession, task_id: str
 ) -> list[TaskComment]:
     """Fetch comments for a task via XHR endpoint."""
     try:
-        resp = await client.post(TASK_COMMENTS_URL, data={"caTaskId": task_id})
-        resp.raise_for_status()
+        resp = await session.request(
+            "POST", TASK_COMMENTS_URL, is_valid=is_json_response, data={"caTaskId": task_id}
+        )
         data = resp.json()
         return [
             TaskComment(
@@ -354,100 +660,252 @@ async def fetch_task_comments(
         return []
 
 
-def is_transient_error(exc: BaseException) -> bool:
-    if isinstance(exc, (httpx.ReadError, httpx.ReadTimeout, httpx.ConnectTimeout)):
-        return True
-    if isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code >= 500:
-        return True
-    return False
+async def fetch_task_comments_with_semaphore(
+    semaphore: asyncio.Semaphore, session: PortalSession, task_id: str
+) -> list[TaskComment]:
+    async with semaphore:
+        return await fetch_task_comments(session, task_id)
+
+
+def is_json_response(resp: httpx.Response) -> bool:
+    try:
+        resp.json()
+    except ValueError:
+        return False
+    return True
+
+
+def parse_permit(content: bytes, search_result: SearchResult, fetched_at: str) -> Permit:
+    """Parse a permit page. Task comments are left empty."""
+    page = PermitPage(lxml.html.fromstring(content))
+    return Permit(
+        permit_id=search_result.permit_id,
+        project_number=search_result.project_number,
+        url=f"{PERMIT_URL}?caObjectId={search_result.permit_id}",
+        fetched_at=fetched_at,
+        search_result=search_result,
+        info=parse_info(page),
+        parent_cases=parse_case_links(page, "Parent Cases"),
+        child_cases=parse_case_links(page, "Child Cases"),
+        site_addresses=parse_site_addresses(page),
+        contacts=parse_contacts(page),
+        contractors=parse_contractors(page),
+        details=parse_details(page),
+        tasks=parse_tasks(page),
+        inspections=parse_inspections(page),
+        conditions=parse_conditions(page),
+        flags=parse_flags(page),
+        notes=parse_notes(page),
+        fees=parse_fees(page),
+        payments=parse_payments(page),
+        attachments=parse_attachments(page),
+    )
+
+
+@functools.cache
+def get_html_cache() -> HtmlCache:
+    """Open the HTML cache, importing pages from the old per-file layout on read."""
+    return HtmlCache(HTML_CACHE_PATH, legacy_dir=HTML_CACHE_DIR)
 
 
 def get_cached_html(permit_id: str) -> bytes | None:
     """Load cached HTML if available."""
-    cache_file = HTML_CACHE_DIR / f"{permit_id}.html"
-    if cache_file.exists():
-        return cache_file.read_bytes()
-    return None
+    return get_html_cache().get(permit_id)
 
 
-def save_html_cache(permit_id: str, content: bytes) -> None:
+def save_html_cache(permit_id: str, content: bytes, etag: str | None = None) -> None:
     """Save HTML to cache."""
-    HTML_CACHE_DIR.mkdir(exist_ok=True)
-    cache_file = HTML_CACHE_DIR / f"{permit_id}.html"
-    cache_file.write_bytes(content)
+    get_html_cache().put(permit_id, content, etag=etag)
+
+
+def count_retry(retry_state: RetryCallState) -> None:
+    stats = retry_state.kwargs.get("stats")
+    if stats:
+        stats.count("retries")
 
 
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=1, max=10),
     retry=retry_if_exception(is_transient_error),
+    before_sleep=count_retry,
 )
 async def fetch_permit(
-    client: httpx.AsyncClient, search_result: SearchResult, use_cache: bool = True
+    session: PortalSession,
+    search_result: SearchResult,
+    comment_semaphore: asyncio.Semaphore,
+    use_cache: bool = True,
+    *,
+    stats: FetchStats | None = None,
 ) -> Permit:
-    url = f"{PERMIT_URL}?caObjectId={search_result.permit_id}"
+    stats = stats or FetchStats()
 
-    # Try cache first
-    content = get_cached_html(search_result.permit_id) if use_cache else None
+    # Try cache first, ignoring login pages cached before expiry was detected
+    content = None
+    if use_cache:
+        with stats.time("cache_lookup"):
+            content = get_cached_html(search_result.permit_id)
+        if content is not None and not is_permit_page(content):
+            content = None
+        stats.count("cache_hits" if content is not None else "cache_misses")
 
     if content is None:
-        resp = await client.get(PERMIT_URL, params={"caObjectId": search_result.permit_id})
-        resp.raise_for_status()
+        # Only real permit pages get past session.request, so a login form
+        # served by an expired session is never cached
+        with stats.time("get"):
+            resp = await session.request(
+                "GET",
+                PERMIT_URL,
+                is_valid=lambda r: is_permit_page(r.content),
+                params={"caObjectId": search_result.permit_id},
+            )
         content = resp.content
-        save_html_cache(search_result.permit_id, content)
+        with stats.time("cache_write"):
+            save_html_cache(search_result.permit_id, content, resp.headers.get("etag"))
+
+    with stats.time("parse"):
+        permit = parse_permit(content, search_result, datetime.now(timezone.utc).isoformat())
+
+    # Fetch comments for all tasks with a task_id concurrently. The comment
+    # semaphore is shared across permits, so a Site Plan with dozens of review
+    # tasks can't monopolize the connection pool.
+    commented = [task for task in permit.tasks if task.task_id]
+    stats.count("comment_requests", len(commented))
+    with stats.time("comments"):
+        comments = await asyncio.gather(*(
+            fetch_task_comments_with_semaphore(comment_semaphore, session, task.task_id)
+            for task in commented
+        ))
+    for task, task_comments in zip(commented, comments):
+        task.comments = task_comments
 
-    doc = lxml.html.fromstring(content)
+    return permit
 
-    # Parse tasks and fetch comments for each task with a task_id
-    tasks = parse_tasks(doc)
-    for task in tasks:
-        if task.task_id:
-            task.comments = await fetch_task_comments(client, task.task_id)
 
-    return Permit(
-        permit_id=search_result.permit_id,
-        project_number=search_result.project_number,
-        url=url,
-        fetched_at=datetime.now(timezone.utc).isoformat(),
-        search_result=search_result,
-        info=parse_info(doc),
-        parent_cases=parse_case_links(doc, "Parent Cases"),
-        child_cases=parse_case_links(doc, "Child Cases"),
-        site_addresses=parse_site_addresses(doc),
-        contacts=parse_contacts(doc),
-        contractors=parse_contractors(doc),
-        details=parse_details(doc),
-        tasks=tasks,
-        inspections=parse_inspections(doc),
-        conditions=parse_conditions(doc),
-        flags=parse_flags(doc),
-        notes=parse_notes(doc),
-        fees=parse_fees(doc),
-        payments=parse_payments(doc),
-        attachments=parse_attachments(doc),
-    )
+def load_fetched_search_results(output_path: Path) -> dict[str, SearchResult]:
+    """Load the stored search row for each permit already in the output file."""
+    if not output_path.exists():
+        return {}
+    fetched: dict[str, SearchResult] = {}
+    with open(output_path, "rb") as f:
+        for line in f:
+            if line.strip():
+                permit = json_loads(line)
+                fetched[permit["permit_id"]] = SearchResult.model_validate(permit["search_result"])
+    return fetched
 
 
-async def fetch_permit_with_semaphore(
-    semaphore: asyncio.Semaphore,
-    client: httpx.AsyncClient,
-    search_result: SearchResult,
-    use_cache: bool = True,
-) -> Permit:
-    async with semaphore:
-        return await fetch_permit(client, search_result, use_cache)
+def needs_refresh(fresh: SearchResult, stored: SearchResult) -> bool:
+    """Check whether a previously fetched permit should be refetched.
 
+    Permits are refetched when their search row changed (status, date, etc.)
+    or when they're still open, since tasks, comments and child cases can
+    change without the search row changing.
+    """
+    return fresh != stored or fresh.status in OPEN_STATUSES
 
-def load_fetched_ids(output_path: Path) -> set[str]:
-    if not output_path.exists():
-        return set()
-    fetched = set()
-    with open(output_path) as f:
+
+def compact_permits(output_path: Path) -> int:
+    """Rewrite the output so each permit appears once, with its latest record.
+
+    Refreshed permits are appended to the file as they're fetched; compacting
+    moves each one back to the position of its original record. Returns the
+    number of permits in the compacted file.
+    """
+    # First pass: remember where each permit first appeared and where its
+    # latest record starts, without holding the records in memory
+    latest_offset: dict[str, int] = {}
+    with open(output_path, "rb") as f:
+        offset = 0
         for line in f:
             if line.strip():
-                permit = json.loads(line)
-                fetched.add(permit["permit_id"])
-    return fetched
+                latest_offset[json_loads(line)["permit_id"]] = offset
+            offset += len(line)
+
+    tmp_path = output_path.with_suffix(output_path.suffix + ".tmp")
+    with open(output_path, "rb") as src, open(tmp_path, "wb") as dst:
+        for offset in latest_offset.values():
+            src.seek(offset)
+            dst.write(src.readline())
+    tmp_path.replace(output_path)
+    return len(latest_offset)
+
+
+def reparse_cached_permit(line: str) -> str | None:
+    """Re-parse a stored permit from its cached page (runs in a worker process).
+
+    Task comments are carried over from the stored record by task_id rather
+    than refetched. Returns the new JSONL line, or None if the page isn't cached.
+    """
+    stored = Permit.model_validate_json(line)
+    entry = get_html_cache().get_entry(stored.permit_id)
+    if entry is None or not is_permit_page(entry.content):
+        return None
+
+    permit = parse_permit(entry.content, stored.search_result, entry.fetched_at)
+    stored_comments = {t.task_id: t.comments for t in stored.tasks if t.task_id}
+    for task in permit.tasks:
+        if task.task_id:
+            task.comments = stored_comments.get(task.task_id, [])
+    return permit.model_dump_json() + "\n"
+
+
+def reparse_from_cache(output_path: Path, workers: int | None = None) -> None:
+    """Rebuild the output file by re-parsing cached pages, without any HTTP.
+
+    Pages are parsed across a process pool. At most a few pages per worker are
+    in flight, and records are written in their original order. Permits
+    without a cached page, or whose record or page fails to parse, are kept
+    as-is.
+    """
+    workers = workers or os.cpu_count() or 1
+    tmp_path = output_path.with_suffix(output_path.suffix + ".tmp")
+    reparsed = kept = failed = 0
+    recover_jsonl(output_path)
+
+    # The parent never opens the cache; each worker opens its own connection
+    try:
+        with (
+            ProcessPoolExecutor(max_workers=workers) as executor,
+            open(output_path) as src,
+            open(tmp_path, "w") as dst,
+            tqdm(desc="Re-parsing permits") as progress,
+        ):
+            pending: deque[tuple[str, Future[str | None]]] = deque()
+
+            def drain(limit: int) -> None:
+                nonlocal reparsed, kept, failed
+                while len(pending) > limit:
+                    line, future = pending.popleft()
+                    try:
+                        result = future.result()
+                    except Exception as exc:
+                        print(f"Keeping record that failed to re-parse: {exc!r}"[:200])
+                        result = None
+                        failed += 1
+                    if result is None:
+                        dst.write(line)
+                        kept += 1
+                    else:
+                        dst.write(result)
+                        reparsed += 1
+                    progress.update()
+
+            for line in src:
+                if not line.strip():
+                    continue
+                pending.append((line, executor.submit(reparse_cached_permit, line)))
+                drain(workers * 4)
+            drain(0)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    tmp_path.replace(output_path)
+    print(
+        f"Re-parsed {reparsed} permits from cache ({kept} kept as-is, "
+        f"{failed} of them because they failed to parse)"
+    )
 
 
 async def main(
@@ -456,7 +914,15 @@ async def main(
     output_path: Path,
     overwrite: bool,
     concurrency: int,
+    comment_concurrency: int,
+    rate: float,
+    burst: int,
     no_cache: bool = False,
+    refresh: bool = False,
+    http2: bool = False,
+    max_connections: int | None = None,
+    keepalive_expiry: float = 30.0,
+    max_attempts: int = 5,
 ) -> None:
     load_dotenv()
     username = os.environ["PERMITS_USERNAME"]
@@ -465,60 +931,221 @@ async def main(
     if overwrite and output_path.exists():
         output_path.unlink()
 
-    fetched_ids = load_fetched_ids(output_path)
-    print(f"Already fetched: {len(fetched_ids)} permits")
+    queue_path = output_path.with_suffix(".queue.sqlite")
+    if overwrite:
+        queue_path.unlink(missing_ok=True)
 
-    async with httpx.AsyncClient(timeout=60, headers=HEADERS, follow_redirects=True) as client:
-        await login(client, username, password)
-        print("Logged in successfully")
+    recover_jsonl(output_path)
+    stored = load_fetched_search_results(output_path)
+    print(f"Already fetched: {len(stored)} permits")
 
-        print(f"Searching for permits from {start_date} to {end_date}...")
-        search_results = await search_permits(client, start_date, end_date)
-        print(f"Found {len(search_results)} unique permits")
+    with closing(FetchQueue(queue_path, max_attempts)) as queue:
+        queue.start_run(set(stored))
 
-        to_fetch = [r for r in search_results if r.permit_id not in fetched_ids]
-        print(f"To fetch: {len(to_fetch)} permits")
-
-        if not to_fetch:
-            print("Nothing to fetch")
-            return
-
-        semaphore = asyncio.Semaphore(concurrency)
-        use_cache = not no_cache
-        tasks = [
-            fetch_permit_with_semaphore(semaphore, client, sr, use_cache)
-            for sr in to_fetch
-        ]
-
-        with open(output_path, "a") as f:
-            for coro in tqdm(
-                asyncio.as_completed(tasks),
-                total=len(tasks),
-                desc="Fetching permits",
+        # Size the pool to cover every permit and comment request that can be
+        # in flight, so requests never queue waiting for a connection
+        max_connections = max_connections or concurrency + comment_concurrency
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        async with httpx.AsyncClient(
+            timeout=60,
+            headers=HEADERS,
+            follow_redirects=True,
+            http2=http2,
+            limits=limits,
+        ) as client:
+            connection_stats = ConnectionStats()
+            connection_stats.install(client)
+            limiter = None
+            if rate > 0:
+                limiter = RateLimiter(rate, burst)
+                limiter.install(client)
+
+            session = PortalSession(client, username, password)
+            await session.login()
+            print("Logged in successfully")
+
+            print(f"Searching for permits from {start_date} to {end_date}...")
+            search_checkpoint = output_path.with_suffix(".search.jsonl")
+            if refresh:
+                # A refresh needs current statuses, not an earlier run's results
+                search_checkpoint.unlink(missing_ok=True)
+            search_results = await search_permits(
+                session, start_date, end_date, concurrency, search_checkpoint
+            )
+            # The checkpoint only needs to survive an interrupted search
+            search_checkpoint.unlink(missing_ok=True)
+            print(f"Found {len(search_results)} unique permits")
+
+            new = [r for r in search_results if r.permit_id not in stored]
+            stale_ids: set[str] = set()
+            if refresh:
+                stale_ids = {
+                    r.permit_id
+                    for r in search_results
+                    if r.permit_id in stored and needs_refresh(r, stored[r.permit_id])
+                }
+            print(f"To fetch: {len(new)} new permits, {len(stale_ids)} to refresh")
+
+            queue.enqueue(new)
+            # Refreshed permits bypass the HTML cache, which holds the stale page
+            queue.enqueue([r for r in search_results if r.permit_id in stale_ids], use_cache=False)
+
+            stats = FetchStats()
+            report_path = output_path.with_suffix(".report.json")
+
+            def write_report() -> None:
+                stats.write(
+                    report_path,
+                    queue=queue.counts(),
+                    connections={
+                        "requests": connection_stats.requests,
+                        "connections": connection_stats.connections,
+                        "tls_handshakes": connection_stats.tls_handshakes,
+                    },
+                    relogins=session.relogins,
+                    throttled_responses=limiter.throttled if limiter else 0,
+                )
+                print(f"Wrote run report to {report_path}")
+
+            pending = queue.pending_count()
+            if not pending:
+                print("Nothing to fetch")
+                # Replace the previous run's report so it doesn't look current
+                write_report()
+                return
+            print(f"Queued: {pending} permits (including retries from earlier runs)")
+
+            comment_semaphore = asyncio.Semaphore(comment_concurrency)
+            fetched_ids = set(stored)
+            refetched = 0
+
+            async def worker(writer: JsonlWriter, progress: tqdm) -> None:
+                nonlocal refetched
+                while (job := queue.claim()) is not None:
+                    sr, job_use_cache = job
+                    try:
+                        with stats.time("permit"):
+                            permit = await fetch_permit(
+                                session, sr, comment_semaphore, not no_cache and job_use_cache,
+                                stats=stats,
+                            )
+                    except Exception as exc:
+                        if isinstance(exc, RetryError):
+                            exc = exc.last_attempt.exception() or exc
+                        message = str(exc).splitlines()[0] if str(exc) else ""
+                        queue.mark_failed(sr.permit_id, f"{type(exc).__name__}: {message}")
+                        stats.count("permits_failed")
+                    else:
+                        with stats.time("serialize"):
+                            line = permit.model_dump_json()
+                        with stats.time("write"):
+                            writer.write(line)
+                        queue.mark_done(sr.permit_id)
+                        stats.count("permits_done")
+                        if sr.permit_id in fetched_ids:
+                            refetched += 1
+                        fetched_ids.add(sr.permit_id)
+                    progress.update()
+
+            with (
+                JsonlWriter(output_path) as writer,
+                tqdm(total=pending, desc="Fetching permits") as progress,
             ):
-                permit = await coro
-                f.write(permit.model_dump_json() + "\n")
-                f.flush()
-
-        print(f"Done. Total permits in {output_path}: {len(fetched_ids) + len(to_fetch)}")
+                await asyncio.gather(*(worker(writer, progress) for _ in range(concurrency)))
+
+            # Refetched permits were appended; move them back into place
+            if refetched:
+                compact_permits(output_path)
+                print(f"Refreshed {refetched} permits in place")
+            print(f"Done. Total permits in {output_path}: {len(fetched_ids)}")
+
+            counts = queue.counts()
+            print("Queue: " + ", ".join(
+                f"{counts.get(status, 0)} {status}" for status in (DONE, FAILED, PENDING)
+            ))
+            for permit_id, attempts, error in queue.failures():
+                print(f"  Failed {permit_id} after {attempts} attempt(s): {error}")
+            if exhausted := queue.exhausted_count():
+                print(f"{exhausted} permits reached --max-attempts and won't be retried")
+            print(f"Connections: {connection_stats.summary()}")
+            write_report()
+            if session.relogins:
+                print(f"Re-logged in {session.relogins} time(s) after session expiry")
+            if limiter and limiter.throttled:
+                print(
+                    f"Portal throttled {limiter.throttled} responses; "
+                    f"final rate {limiter.rate:.1f} req/s"
+                )
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Fetch Charlottesville permit data")
-    parser.add_argument("--start-date", required=True, type=date.fromisoformat, help="Start date (YYYY-MM-DD)")
+    parser.add_argument("--start-date", type=date.fromisoformat, help="Start date (YYYY-MM-DD)")
     parser.add_argument("--end-date", type=date.fromisoformat, help="End date (YYYY-MM-DD), defaults to today")
     parser.add_argument("--output", required=True, type=Path, help="Output JSONL file")
     parser.add_argument("--overwrite", action="store_true", help="Overwrite existing output file")
     parser.add_argument("--concurrency", type=int, default=10, help="Max concurrent requests")
+    parser.add_argument(
+        "--comment-concurrency", type=int, default=20,
+        help="Max concurrent task comment requests (shared across permits)",
+    )
+    parser.add_argument(
+        "--rate", type=float, default=10.0,
+        help="Max requests per second across all requests (0 to disable)",
+    )
+    parser.add_argument("--burst", type=int, default=20, help="Max burst of requests above --rate")
     parser.add_argument("--no-cache", action="store_true", help="Bypass HTML cache and re-fetch")
+    parser.add_argument(
+        "--refresh", action="store_true",
+        help="Refetch already-fetched permits whose status changed or that are still open",
+    )
+    parser.add_argument("--http2", action="store_true", help="Use HTTP/2 multiplexing")
+    parser.add_argument(
+        "--max-connections", type=int,
+        help="Connection pool size (default: --concurrency + --comment-concurrency)",
+    )
+    parser.add_argument(
+        "--keepalive-expiry", type=float, default=30.0,
+        help="Seconds to keep idle connections open",
+    )
+    parser.add_argument(
+        "--max-attempts", type=int, default=5,
+        help="Stop retrying a permit after this many failed fetches in a row",
+    )
+    parser.add_argument(
+        "--reparse-from-cache", action="store_true",
+        help="Rebuild the output file from the HTML cache without fetching",
+    )
+    parser.add_argument("--workers", type=int, help="Worker processes for --reparse-from-cache")
 
     args = parser.parse_args()
 
-    asyncio.run(main(
-        args.start_date,
-        args.end_date or date.today(),
-        args.output,
-        args.overwrite,
-        args.concurrency,
-        args.no_cache,
-    ))
+    if args.burst < 1:
+        parser.error("--burst must be at least 1")
+    if args.max_attempts < 1:
+        parser.error("--max-attempts must be at least 1")
+    if args.reparse_from_cache:
+        reparse_from_cache(args.output, args.workers)
+    else:
+        if args.start_date is None:
+            parser.error("--start-date is required unless --reparse-from-cache is given")
+        asyncio.run(main(
+            args.start_date,
+            args.end_date or date.today(),
+            args.output,
+            args.overwrite,
+            args.concurrency,
+            args.comment_concurrency,
+            args.rate,
+            args.burst,
+            args.no_cache,
+            args.refresh,
+            args.http2,
+            args.max_connections,
+            args.keepalive_expiry,
+            args.max_attempts,
+        ))
@@ -0,0 +1,147 @@
+"""Persistent work queue tracking the fetch status of each permit.
+
+Each permit is pending, in_flight, done or failed, with its attempt count and
+last error. The queue lives in SQLite next to the output file, so a long
+backfill can be interrupted and resumed without losing track of bad permits.
+A permit that fails max_attempts times in a row stays failed instead of being
+retried on every run.
+"""
+
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+
+from models import SearchResult
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    permit_id TEXT PRIMARY KEY,
+    search_result TEXT NOT NULL,
+    use_cache INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status);
+"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class FetchQueue:
+    def __init__(self, path: Path, max_attempts: int = 5) -> None:
+        self.path = path
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+
+    def start_run(self, fetched_ids: set[str]) -> None:
+        """Requeue work left over from previous runs.
+
+        In-flight jobs were interrupted and failed jobs get another attempt,
+        unless they have used up max_attempts. Done jobs missing from the
+        output (lost in an unflushed batch) are requeued too.
+        """
+        with self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts < ? THEN ? ELSE ? END"
+                " WHERE status IN (?, ?, ?)",
+                (self.max_attempts, PENDING, FAILED, PENDING, IN_FLIGHT, FAILED),
+            )
+            done = [row[0] for row in self.conn.execute(
+                "SELECT permit_id FROM jobs WHERE status = ?", (DONE,)
+            )]
+            self.conn.executemany(
+                "UPDATE jobs SET status = ? WHERE permit_id = ?",
+                [(PENDING, pid) for pid in done if pid not in fetched_ids],
+            )
+
+    def enqueue(self, search_results: list[SearchResult], use_cache: bool = True) -> None:
+        """Add permits as pending, updating the search row of known permits.
+
+        Permits that have used up max_attempts stay failed.
+        """
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO jobs (permit_id, search_result, use_cache, status, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (permit_id) DO UPDATE SET"
+                " search_result = excluded.search_result,"
+                " use_cache = excluded.use_cache,"
+                " status = CASE WHEN attempts < ? THEN excluded.status ELSE status END,"
+                " updated_at = excluded.updated_at",
+                [
+                    (sr.permit_id, sr.model_dump_json(), use_cache, PENDING, _now(),
+                     self.max_attempts)
+                    for sr in search_results
+                ],
+            )
+
+    def claim(self) -> tuple[SearchResult, bool] | None:
+        """Mark the next pending job in-flight and return (search_result, use_cache)."""
+        row = self.conn.execute(
+            "SELECT permit_id, search_result, use_cache FROM jobs"
+            " WHERE status = ? ORDER BY rowid LIMIT 1",
+            (PENDING,),
+        ).fetchone()
+        if row is None:
+            return None
+        with self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ?"
+                " WHERE permit_id = ?",
+                (IN_FLIGHT, _now(), row[0]),
+            )
+        return SearchResult.model_validate_json(row[1]), bool(row[2])
+
+    def mark_done(self, permit_id: str) -> None:
+        # attempts counts failures in a row, so a later refresh starts afresh
+        with self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, last_error = NULL, updated_at = ?"
+                " WHERE permit_id = ?",
+                (DONE, _now(), permit_id),
+            )
+
+    def mark_failed(self, permit_id: str, error: str) -> None:
+        with self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, last_error = ?, updated_at = ?"
+                " WHERE permit_id = ?",
+                (FAILED, error, _now(), permit_id),
+            )
+
+    def pending_count(self) -> int:
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = ?", (PENDING,)
+        ).fetchone()[0]
+
+    def counts(self) -> dict[str, int]:
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+
+    def exhausted_count(self) -> int:
+        """Count failed jobs that won't be retried until max_attempts is raised."""
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = ? AND attempts >= ?",
+            (FAILED, self.max_attempts),
+        ).fetchone()[0]
+
+    def failures(self, limit: int = 10) -> list[tuple[str, int, str]]:
+        """Return (permit_id, attempts, last_error) for failed jobs."""
+        return self.conn.execute(
+            "SELECT permit_id, attempts, last_error FROM jobs"
+            " WHERE status = ? ORDER BY updated_at LIMIT ?",
+            (FAILED, limit),
+        ).fetchall()
+
+    def close(self) -> None:
+        self.conn.close()
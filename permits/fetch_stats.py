@@ -0,0 +1,69 @@
+"""Per-stage timings and counters for fetch_permits.py runs."""
+
+import json
+import math
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class FetchStats:
+    """Collects stage durations (seconds) and event counts for a run."""
+
+    def __init__(self) -> None:
+        self.timings: dict[str, list[float]] = defaultdict(list)
+        self.counters: Counter[str] = Counter()
+        self.started_at = datetime.now(timezone.utc)
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage].append(time.perf_counter() - start)
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] += n
+
+    def report(self, **extra: Any) -> dict[str, Any]:
+        stages = {}
+        for stage, values in self.timings.items():
+            values = sorted(values)
+            stages[stage] = {
+                "count": len(values),
+                "total": round(sum(values), 3),
+                "mean": round(sum(values) / len(values), 4),
+                "p50": round(percentile(values, 50), 4),
+                "p95": round(percentile(values, 95), 4),
+                "p99": round(percentile(values, 99), 4),
+                "max": round(values[-1], 4),
+            }
+
+        lookups = self.counters["cache_hits"] + self.counters["cache_misses"]
+        return {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "wall_seconds": round(time.perf_counter() - self._started, 3),
+            "cache_hit_ratio": (
+                round(self.counters["cache_hits"] / lookups, 4) if lookups else None
+            ),
+            "counters": dict(self.counters),
+            "stages": stages,
+            **extra,
+        }
+
+    def write(self, path: Path, **extra: Any) -> None:
+        with open(path, "w") as f:
+            json.dump(self.report(**extra), f, indent=2)
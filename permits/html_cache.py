@@ -0,0 +1,117 @@
+"""Compressed, content-addressed cache of fetched permit pages.
+
+Pages are gzip-compressed and stored once per SHA-256 in a single SQLite
+file. An index table maps each permit_id to its page hash, fetch time and
+ETag.
+"""
+
+import gzip
+import hashlib
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import NamedTuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    content BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    permit_id TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL REFERENCES blobs (sha256),
+    fetched_at TEXT NOT NULL,
+    etag TEXT
+);
+"""
+
+
+class CacheEntry(NamedTuple):
+    content: bytes
+    sha256: str
+    fetched_at: str
+    etag: str | None
+
+
+class HtmlCache:
+    """SQLite-backed page store keyed by permit_id.
+
+    If legacy_dir is given, pages missing from the store are looked up as
+    `{legacy_dir}/{permit_id}.html` files (the old cache layout), imported
+    on first read and then deleted.
+    """
+
+    def __init__(self, path: Path, legacy_dir: Path | None = None) -> None:
+        self.path = path
+        self.legacy_dir = legacy_dir
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def get_entry(self, permit_id: str) -> CacheEntry | None:
+        row = self.conn.execute(
+            "SELECT b.content, p.sha256, p.fetched_at, p.etag"
+            " FROM pages p JOIN blobs b USING (sha256) WHERE p.permit_id = ?",
+            (permit_id,),
+        ).fetchone()
+        if row:
+            return CacheEntry(gzip.decompress(row[0]), row[1], row[2], row[3])
+
+        if self.legacy_dir:
+            legacy_file = self.legacy_dir / f"{permit_id}.html"
+            if legacy_file.exists():
+                fetched_at = datetime.fromtimestamp(
+                    legacy_file.stat().st_mtime, timezone.utc
+                ).isoformat()
+                content = legacy_file.read_bytes()
+                self.put(permit_id, content, fetched_at=fetched_at)
+                # Committed to the store, so the old copy is no longer needed
+                legacy_file.unlink()
+                return self.get_entry(permit_id)
+        return None
+
+    def get(self, permit_id: str) -> bytes | None:
+        entry = self.get_entry(permit_id)
+        return entry.content if entry else None
+
+    def put(
+        self,
+        permit_id: str,
+        content: bytes,
+        etag: str | None = None,
+        fetched_at: str | None = None,
+    ) -> str:
+        """Store a page, returning its SHA-256. Identical pages share one blob."""
+        digest = hashlib.sha256(content).hexdigest()
+        fetched_at = fetched_at or datetime.now(timezone.utc).isoformat()
+        with self.conn:
+            old = self.conn.execute(
+                "SELECT sha256 FROM pages WHERE permit_id = ?", (permit_id,)
+            ).fetchone()
+            self.conn.execute(
+                "INSERT OR IGNORE INTO blobs (sha256, content) VALUES (?, ?)",
+                (digest, gzip.compress(content, mtime=0)),
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages (permit_id, sha256, fetched_at, etag)"
+                " VALUES (?, ?, ?, ?)",
+                (permit_id, digest, fetched_at, etag),
+            )
+            # Drop the previous page if nothing else references it
+            if old and old[0] != digest:
+                self.conn.execute(
+                    "DELETE FROM blobs WHERE sha256 = ?"
+                    " AND NOT EXISTS (SELECT 1 FROM pages WHERE sha256 = ?)",
+                    (old[0], old[0]),
+                )
+        return digest
+
+    def permit_ids(self) -> list[str]:
+        return [
+            row[0]
+            for row in self.conn.execute("SELECT permit_id FROM pages ORDER BY permit_id")
+        ]
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,110 @@
+"""Batched, crash-safe JSONL appender.
+
+Records are buffered and committed in batches. Each batch is written to a
+temp segment file, fsynced and renamed into place before it is appended to
+the output. After a crash, `recover_jsonl` replays a committed segment and
+truncates any torn final line, so the output always ends on a complete record.
+"""
+
+import os
+import time
+from pathlib import Path
+
+
+def _segment_path(path: Path) -> Path:
+    return path.with_name(path.name + ".segment")
+
+
+def _segment_tmp_path(path: Path) -> Path:
+    return path.with_name(path.name + ".segment.tmp")
+
+
+def _append_durably(path: Path, data: bytes) -> None:
+    with open(path, "ab") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def recover_jsonl(path: Path) -> None:
+    """Make a JSONL file safe to read and append to after a crash.
+
+    Truncates a torn (newline-less) final line, then appends the last
+    committed segment if the writer died before applying it.
+    """
+    if path.exists():
+        with open(path, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            # Scan backwards for the last newline; anything after it is torn
+            end = size
+            while end > 0:
+                step = min(65536, end)
+                f.seek(end - step)
+                chunk = f.read(step)
+                newline = chunk.rfind(b"\n")
+                if newline != -1:
+                    end = end - step + newline + 1
+                    break
+                end -= step
+            if end < size:
+                print(f"Truncating torn final line in {path} ({size - end} bytes)")
+                f.truncate(end)
+
+    segment = _segment_path(path)
+    if segment.exists():
+        # The segment may already have been (partly) applied; duplicate records
+        # are harmless since readers keep the last record per permit
+        _append_durably(path, segment.read_bytes())
+        segment.unlink()
+    _segment_tmp_path(path).unlink(missing_ok=True)
+
+
+class JsonlWriter:
+    """Append lines to a JSONL file, committing every N lines or T seconds."""
+
+    def __init__(self, path: Path, batch_size: int = 50, flush_interval: float = 5.0) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending: list[str] = []
+        self.last_flush = time.monotonic()
+        self.written = 0
+        recover_jsonl(path)
+
+    def write(self, line: str) -> None:
+        self.pending.append(line if line.endswith("\n") else line + "\n")
+        if (
+            len(self.pending) >= self.batch_size
+            or time.monotonic() - self.last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        self.last_flush = time.monotonic()
+        if not self.pending:
+            return
+        data = "".join(self.pending).encode()
+
+        # Commit the batch: once the segment is renamed into place it will be
+        # applied, either below or by recover_jsonl on the next run
+        segment = _segment_path(self.path)
+        tmp = _segment_tmp_path(self.path)
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        tmp.replace(segment)
+
+        _append_durably(self.path, data)
+        segment.unlink()
+        self.written += len(self.pending)
+        self.pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "pydantic",
+# ]
+# ///
+"""Look up permits by address or parcel number.
+
+With a query argument, prints matches and exits. Without one, starts an
+interactive prompt. Addresses match at word boundaries and the last word
+may be a prefix ("0 5TH" finds "0 5TH ST SW"). Queries made only of
+digits are also tried as parcel number prefixes.
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from permit_store import PermitStore
+
+
+def lookup(store: PermitStore, query: str, prefix: bool = True, parcel: bool = False) -> list[str]:
+    """Return matching permit IDs, address matches first."""
+    ids = [] if parcel else store.find_ids_by_address(query, prefix)
+    if parcel or query.strip().isdigit():
+        seen = set(ids)
+        ids += [pid for pid in store.find_ids_by_parcel(query, prefix) if pid not in seen]
+    return ids
+
+
+def print_matches(store: PermitStore, permit_ids: list[str], limit: int) -> None:
+    for permit_id in permit_ids[:limit]:
+        p = store[permit_id]
+        sr = p.search_result
+        addr = p.site_addresses[0].address if p.site_addresses else sr.site_address
+        print(f"{permit_id:<12} {sr.date_created:<10}  {sr.permit_type}/{sr.sub_type} "
+              f"[{sr.status}]  {addr}  {sr.parcel_number}")
+    if len(permit_ids) > limit:
+        print(f"... and {len(permit_ids) - limit} more")
+
+
+def run_query(store: PermitStore, query: str, args: argparse.Namespace) -> int:
+    start = time.perf_counter()
+    permit_ids = lookup(store, query, prefix=not args.exact, parcel=args.parcel)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print_matches(store, permit_ids, args.limit)
+    print(f"({len(permit_ids)} permits in {elapsed_ms:.1f} ms)")
+    return len(permit_ids)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Look up permits by address or parcel")
+    parser.add_argument("query", nargs="?", help="Address or parcel (omit for interactive mode)")
+    parser.add_argument(
+        "--data",
+        type=Path,
+        default=Path(__file__).parent / "permits.jsonl",
+        help="Path to permits.jsonl file",
+    )
+    parser.add_argument("--parcel", action="store_true", help="Search parcel numbers only")
+    parser.add_argument(
+        "--exact", action="store_true", help="Require the last word to match in full"
+    )
+    parser.add_argument("--limit", type=int, default=50, help="Max permits to print")
+    args = parser.parse_args()
+
+    if not args.data.exists():
+        print(f"Error: Data file not found: {args.data}")
+        return 1
+
+    with PermitStore(args.data) as store:
+        if args.query:
+            return 0 if run_query(store, args.query, args) else 1
+
+        print(f"{len(store)} permits indexed. Enter an address or parcel (Ctrl-D to quit).")
+        while True:
+            try:
+                query = input("> ").strip()
+            except (EOFError, KeyboardInterrupt):
+                print()
+                return 0
+            if query:
+                run_query(store, query, args)
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -1,8 +1,9 @@
 """Pydantic models for Charlottesville permit data."""
 
 import re
+from typing import Any
 
-from pydantic import BaseModel, computed_field, field_validator
+from pydantic import BaseModel, PrivateAttr, computed_field, field_validator
 
 
 class SearchResult(BaseModel):
@@ -145,6 +146,9 @@ class Permit(BaseModel):
     payments: list[Payment] = []
     attachments: list[Attachment] = []
 
+    # Cache for fields derived by analysis code (see top_developments.derived_fields)
+    _derived: Any = PrivateAttr(default=None)
+
     @computed_field  # type: ignore[prop-decorator]
     @property
     def permit_year(self) -> int | None:
@@ -0,0 +1,158 @@
+"""Precomputed parent/child relationship graph over all permits.
+
+Case links in `parent_cases`/`child_cases` use inconsistent ID formats
+("44910" vs "44910.00"), so they are resolved once through the canonical ID
+table from `permit_utils.build_canonical_ids`. Permits are then grouped into
+connected components with union-find, so finding every permit related to a
+project is a dict lookup instead of a fresh traversal.
+
+The graph is persisted next to permits.jsonl (`permits.jsonl.graph.json`)
+and rebuilt when the JSONL file changes.
+"""
+
+import json
+import os
+from collections import defaultdict
+from collections.abc import Iterable, Iterator, Mapping
+from pathlib import Path
+
+from models import Permit
+from permit_store import PermitStore
+from permit_utils import build_canonical_ids
+
+GRAPH_VERSION = 1
+
+
+def graph_path_for(jsonl_path: Path) -> Path:
+    return jsonl_path.with_name(jsonl_path.name + ".graph.json")
+
+
+def permit_links(permits: Mapping[str, Permit]) -> Iterator[tuple[str, str, str]]:
+    """Yield (permit_id, linked_id, kind) for each case link, kind parent|child."""
+    for permit in permits.values():
+        for case in permit.parent_cases:
+            yield permit.permit_id, case.permit_id, "parent"
+        for case in permit.child_cases:
+            yield permit.permit_id, case.permit_id, "child"
+
+
+class PermitGraph:
+    """Normalized parent/child adjacency plus a connected-component index."""
+
+    def __init__(self, edges: Iterable[tuple[str, str]], permit_ids: Iterable[str] = ()) -> None:
+        """Build from (parent_id, child_id) edges between known permit IDs."""
+        self.children: dict[str, set[str]] = defaultdict(set)
+        self.parents: dict[str, set[str]] = defaultdict(set)
+
+        # Union-find with path halving and union by size
+        uf_parent: dict[str, str] = {pid: pid for pid in permit_ids}
+        size: dict[str, int] = dict.fromkeys(uf_parent, 1)
+
+        def find(x: str) -> str:
+            while uf_parent[x] != x:
+                uf_parent[x] = uf_parent[uf_parent[x]]
+                x = uf_parent[x]
+            return x
+
+        for parent, child in edges:
+            self.children[parent].add(child)
+            self.parents[child].add(parent)
+            for pid in (parent, child):
+                if pid not in uf_parent:
+                    uf_parent[pid] = pid
+                    size[pid] = 1
+            a, b = find(parent), find(child)
+            if a != b:
+                if size[a] < size[b]:
+                    a, b = b, a
+                uf_parent[b] = a
+                size[a] += size[b]
+
+        members: dict[str, list[str]] = defaultdict(list)
+        for pid in uf_parent:
+            members[find(pid)].append(pid)
+        self.components: list[frozenset[str]] = [frozenset(ids) for ids in members.values()]
+        self.component_of: dict[str, int] = {
+            pid: i for i, ids in enumerate(self.components) for pid in ids
+        }
+
+    @classmethod
+    def from_links(
+        cls, links: Iterable[tuple[str, str, str]], permits: Mapping[str, Permit]
+    ) -> "PermitGraph":
+        """Build from raw (permit_id, linked_id, kind) links, normalizing IDs.
+
+        Links to permits that aren't in `permits` are dropped.
+        """
+        canonical = build_canonical_ids(permits)
+
+        def edges() -> Iterator[tuple[str, str]]:
+            for pid, linked_id, kind in links:
+                norm = canonical.get(linked_id)
+                if norm is None:
+                    continue
+                yield (norm, pid) if kind == "parent" else (pid, norm)
+
+        return cls(edges(), permits)
+
+    @classmethod
+    def from_permits(cls, permits: Mapping[str, Permit]) -> "PermitGraph":
+        # The store can list links from its index without validating records
+        links = permits.links() if isinstance(permits, PermitStore) else permit_links(permits)
+        return cls.from_links(links, permits)
+
+    def related(self, permit_id: str) -> frozenset[str]:
+        """All permits connected to permit_id (including itself)."""
+        i = self.component_of.get(permit_id)
+        return self.components[i] if i is not None else frozenset([permit_id])
+
+    def roots(self, permit_ids: Iterable[str]) -> list[str]:
+        """Permits with no parent among permit_ids."""
+        ids = set(permit_ids)
+        return [pid for pid in ids if not self.parents.get(pid, set()) & ids]
+
+    # Persistence
+
+    def to_json(self) -> dict:
+        return {
+            "components": [sorted(ids) for ids in self.components],
+            "edges": sorted(
+                (parent, child)
+                for parent, children in self.children.items()
+                for child in children
+            ),
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "PermitGraph":
+        permit_ids = (pid for ids in data["components"] for pid in ids)
+        return cls((tuple(edge) for edge in data["edges"]), permit_ids)
+
+    def save(self, path: Path, source: Path) -> None:
+        stat = source.stat()
+        data = {
+            "version": GRAPH_VERSION,
+            "source": {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns},
+            **self.to_json(),
+        }
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+
+def load_graph(jsonl_path: Path, permits: Mapping[str, Permit]) -> PermitGraph:
+    """Load the persisted graph for jsonl_path, rebuilding it if stale."""
+    path = graph_path_for(jsonl_path)
+    stat = jsonl_path.stat()
+    if path.exists():
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("version") == GRAPH_VERSION and data.get("source") == {
+            "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+        }:
+            return PermitGraph.from_json(data)
+
+    graph = PermitGraph.from_permits(permits)
+    graph.save(path, jsonl_path)
+    return graph
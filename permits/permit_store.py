@@ -0,0 +1,378 @@
+"""Lazy, indexed read access to permits.jsonl.
+
+`PermitStore` keeps a SQLite index next to the JSONL file mapping each
+permit_id to the byte range of its latest record, plus address, parcel and
+parent/child link lookups. Addresses are also indexed by normalized token
+(see `permit_utils.address_tokens`) for word-boundary and prefix search.
+Records are only validated into `Permit` models
+when accessed, with a bounded LRU cache, so point lookups stay fast and
+memory stays flat however large the dataset grows.
+
+The index is refreshed automatically: appends to the JSONL file are indexed
+incrementally, and a rewritten file (e.g. after compaction) is reindexed. An
+append is told apart from a rewrite by the inode, the size and a hash of the
+last indexed line.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+
+from models import Permit
+from permit_utils import (
+    address_tokens,
+    json_loads,
+    permit_id_candidates,
+    prefix_abbreviations,
+    query_tokens,
+    tokens_match,
+)
+
+INDEX_VERSION = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+CREATE TABLE IF NOT EXISTS records (
+    permit_id TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS addresses (
+    address TEXT NOT NULL,
+    permit_id TEXT NOT NULL,
+    offset INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS parcels (
+    parcel TEXT NOT NULL,
+    permit_id TEXT NOT NULL,
+    offset INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS links (
+    permit_id TEXT NOT NULL,
+    linked_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    offset INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS address_terms (
+    address TEXT PRIMARY KEY,
+    tokens TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS address_tokens (
+    token TEXT NOT NULL,
+    address TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_offset ON records (offset);
+CREATE INDEX IF NOT EXISTS addresses_address ON addresses (address);
+CREATE INDEX IF NOT EXISTS address_tokens_token ON address_tokens (token);
+CREATE INDEX IF NOT EXISTS parcels_parcel ON parcels (parcel);
+CREATE INDEX IF NOT EXISTS links_permit_id ON links (permit_id);
+"""
+
+
+def index_path_for(jsonl_path: Path) -> Path:
+    return jsonl_path.with_name(jsonl_path.name + ".index.sqlite")
+
+
+class PermitStore(Mapping[str, Permit]):
+    """Read-only mapping of permit_id -> Permit backed by a JSONL file.
+
+    Later records for the same permit_id win, matching `load_permits`.
+    """
+
+    def __init__(
+        self,
+        jsonl_path: Path,
+        index_path: Path | None = None,
+        cache_size: int = 256,
+    ) -> None:
+        self.jsonl_path = jsonl_path
+        self.index_path = index_path or index_path_for(jsonl_path)
+        self.conn = sqlite3.connect(self.index_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._file = open(jsonl_path, "rb")
+        self._load = functools.lru_cache(maxsize=cache_size)(self._load_uncached)
+        self.refresh()
+
+    # Index maintenance
+
+    def _meta(self) -> dict:
+        try:
+            return dict(self.conn.execute("SELECT key, value FROM meta"))
+        except sqlite3.OperationalError:
+            return {}
+
+    def refresh(self) -> None:
+        """Bring the index up to date with the JSONL file."""
+        stat = self.jsonl_path.stat()
+        if stat.st_ino != os.fstat(self._file.fileno()).st_ino:
+            # File was replaced (e.g. compacted) since we opened it
+            self._file.close()
+            self._file = open(self.jsonl_path, "rb")
+        meta = self._meta()
+        if (
+            meta.get("version") == INDEX_VERSION
+            and meta.get("inode") == stat.st_ino
+            and meta.get("size") <= stat.st_size
+            and meta.get("tail_sha256")
+            == self._tail_fingerprint(meta["tail_offset"], meta["size"])
+        ):
+            if meta["size"] == stat.st_size and meta.get("mtime_ns") == stat.st_mtime_ns:
+                return
+            # Indexed prefix is unchanged, so the file was only appended to
+            start = meta["size"]
+        else:
+            self.conn.executescript(
+                "DROP TABLE IF EXISTS meta; DROP TABLE IF EXISTS records;"
+                " DROP TABLE IF EXISTS addresses; DROP TABLE IF EXISTS parcels;"
+                " DROP TABLE IF EXISTS links; DROP TABLE IF EXISTS address_terms;"
+                " DROP TABLE IF EXISTS address_tokens;"
+            )
+            self.conn.executescript(_SCHEMA)
+            start = 0
+
+        with self.conn:
+            end, tail_offset = self._index_from(start)
+            if tail_offset is None:
+                tail_offset = meta.get("tail_offset", 0) if start else 0
+            # Drop lookups belonging to records superseded by a later line
+            for table in ("addresses", "parcels", "links"):
+                self.conn.execute(
+                    f"DELETE FROM {table} WHERE offset NOT IN (SELECT offset FROM records)"
+                )
+            self._index_address_tokens()
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [
+                    ("version", INDEX_VERSION),
+                    ("inode", stat.st_ino),
+                    ("size", end),
+                    ("mtime_ns", stat.st_mtime_ns),
+                    ("tail_offset", tail_offset),
+                    ("tail_sha256", self._tail_fingerprint(tail_offset, end)),
+                ],
+            )
+        self._load.cache_clear()
+
+    def _tail_fingerprint(self, offset: int, end: int) -> str:
+        """SHA-256 of the last indexed line, bytes offset..end of the file.
+
+        Rewriting the file in place (open(path, "w"), cp, rsync) can keep the
+        inode and grow the file, so this is what tells an append from a rewrite.
+        """
+        data = os.pread(self._file.fileno(), end - offset, offset)
+        return hashlib.sha256(data).hexdigest()
+
+    def _index_from(self, start: int) -> tuple[int, int | None]:
+        """Index complete lines from byte offset start.
+
+        Returns where it stopped and the offset of the last line indexed
+        (None if there were no new lines).
+        """
+        records, addresses, parcels, links = [], [], [], []
+        self._file.seek(start)
+        offset = start
+        last_offset = None
+        for line in self._file:
+            if not line.endswith(b"\n"):
+                break  # Torn final line still being written; index it next time
+            length = len(line)
+            last_offset = offset
+            if line.strip():
+                data = json_loads(line)
+                pid = data["permit_id"]
+                records.append((pid, offset, length))
+
+                parcel_set = {data["search_result"].get("parcel_number", "")}
+                for addr in data.get("site_addresses", []):
+                    addresses.append((addr["address"], pid, offset))
+                    parcel_set.add(addr.get("parcel_id", ""))
+                parcels.extend((parcel, pid, offset) for parcel in parcel_set if parcel)
+
+                for kind in ("parent", "child"):
+                    for case in data.get(f"{kind}_cases", []):
+                        links.append((pid, case["permit_id"], kind, offset))
+            offset += length
+
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO records (permit_id, offset, length) VALUES (?, ?, ?)",
+            records,
+        )
+        self.conn.executemany(
+            "INSERT INTO addresses (address, permit_id, offset) VALUES (?, ?, ?)", addresses
+        )
+        self.conn.executemany(
+            "INSERT INTO parcels (parcel, permit_id, offset) VALUES (?, ?, ?)", parcels
+        )
+        self.conn.executemany(
+            "INSERT INTO links (permit_id, linked_id, kind, offset) VALUES (?, ?, ?, ?)",
+            links,
+        )
+        return offset, last_offset
+
+    def _index_address_tokens(self) -> None:
+        new = [row[0] for row in self.conn.execute(
+            "SELECT DISTINCT address FROM addresses"
+            " WHERE address NOT IN (SELECT address FROM address_terms)"
+        )]
+        terms, tokens = [], []
+        for address in new:
+            address_toks = address_tokens(address)
+            terms.append((address, " ".join(address_toks)))
+            tokens.extend((token, address) for token in set(address_toks))
+        self.conn.executemany(
+            "INSERT INTO address_terms (address, tokens) VALUES (?, ?)", terms
+        )
+        self.conn.executemany(
+            "INSERT INTO address_tokens (token, address) VALUES (?, ?)", tokens
+        )
+
+    # Mapping interface
+
+    def _load_uncached(self, permit_id: str) -> Permit:
+        row = self.conn.execute(
+            "SELECT offset, length FROM records WHERE permit_id = ?", (permit_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(permit_id)
+        offset, length = row
+        permit = Permit.model_validate_json(os.pread(self._file.fileno(), length, offset))
+        for case in (*permit.parent_cases, *permit.child_cases):
+            case.permit_id = self.canonical_id(case.permit_id) or case.permit_id
+        return permit
+
+    def __getitem__(self, permit_id: str) -> Permit:
+        return self._load(permit_id)
+
+    def __contains__(self, permit_id: object) -> bool:
+        return self.conn.execute(
+            "SELECT 1 FROM records WHERE permit_id = ?", (permit_id,)
+        ).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate permit_ids in file order."""
+        for (permit_id,) in self.conn.execute("SELECT permit_id FROM records ORDER BY offset"):
+            yield permit_id
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    # Lookups
+
+    def canonical_id(self, permit_id: str) -> str | None:
+        """Resolve a case-link ID spelling to a stored permit_id, if any."""
+        for candidate in permit_id_candidates(permit_id):
+            if candidate in self:
+                return candidate
+        return None
+
+    def match_addresses(self, query: str, prefix: bool = False) -> list[str]:
+        """Return distinct site addresses matching query at word boundaries.
+
+        Candidates come from the token index and are then checked for the
+        query tokens appearing in order. With prefix=True the last query
+        token only needs to start a word, abbreviated or spelled out.
+        """
+        tokens = query_tokens(query, prefix)
+        if not tokens:
+            return []
+        clauses, params = [], []
+        for token in tokens[:-1]:
+            clauses.append("SELECT address FROM address_tokens WHERE token = ?")
+            params.append(token)
+        if prefix:
+            # Stored tokens are abbreviated, so 'STR' must also find 'ST'
+            clauses.append(
+                "SELECT address FROM address_tokens WHERE (token >= ? AND token < ?)"
+                " OR token IN (SELECT value FROM json_each(?))"
+            )
+            params += [
+                tokens[-1],
+                tokens[-1] + "\uffff",
+                json.dumps(sorted(prefix_abbreviations(tokens[-1]))),
+            ]
+        else:
+            clauses.append("SELECT address FROM address_tokens WHERE token = ?")
+            params.append(tokens[-1])
+
+        rows = self.conn.execute(
+            "SELECT address, tokens FROM address_terms WHERE address IN ("
+            + " INTERSECT ".join(clauses) + ") ORDER BY address",
+            params,
+        )
+        return [
+            address for address, terms in rows
+            if tokens_match(tokens, terms.split(), prefix)
+        ]
+
+    def find_ids_by_address(self, query: str, prefix: bool = False) -> list[str]:
+        """Permit IDs with a site address matching query, in file order."""
+        addresses = self.match_addresses(query, prefix)
+        rows = self.conn.execute(
+            "SELECT DISTINCT a.permit_id FROM addresses a JOIN records r USING (permit_id)"
+            " WHERE a.address IN (SELECT value FROM json_each(?)) ORDER BY r.offset",
+            (json.dumps(addresses),),
+        )
+        return [permit_id for (permit_id,) in rows]
+
+    def find_ids_by_address_substring(self, query: str) -> list[str]:
+        """Permit IDs with a site address containing query anywhere, in file order.
+
+        Case-insensitive, like the lookup analyze_project.py used before the
+        token index, so mid-word queries ('AIN ST') still match.
+        """
+        rows = self.conn.execute(
+            "SELECT DISTINCT a.permit_id FROM addresses a JOIN records r USING (permit_id)"
+            " WHERE instr(upper(a.address), upper(?)) > 0 ORDER BY r.offset",
+            (query.strip(),),
+        )
+        return [permit_id for (permit_id,) in rows]
+
+    def find_by_address(self, query: str, prefix: bool = False) -> list[Permit]:
+        """Find permits with a site address matching query at word boundaries.
+
+        Same semantics as `permit_utils.find_permits_by_address`, so
+        '0 5TH ST' matches '0 5TH ST SW' but not '210 5TH ST SW'.
+        """
+        return [self[permit_id] for permit_id in self.find_ids_by_address(query, prefix)]
+
+    def find_ids_by_parcel(self, parcel: str, prefix: bool = False) -> list[str]:
+        parcel = parcel.strip()
+        if prefix:
+            where, params = "p.parcel >= ? AND p.parcel < ?", (parcel, parcel + "\uffff")
+        else:
+            where, params = "p.parcel = ?", (parcel,)
+        rows = self.conn.execute(
+            "SELECT DISTINCT p.permit_id FROM parcels p JOIN records r USING (permit_id)"
+            f" WHERE {where} ORDER BY r.offset",
+            params,
+        )
+        return [permit_id for (permit_id,) in rows]
+
+    def find_by_parcel(self, parcel: str, prefix: bool = False) -> list[Permit]:
+        return [self[permit_id] for permit_id in self.find_ids_by_parcel(parcel, prefix)]
+
+    def links(self) -> Iterator[tuple[str, str, str]]:
+        """Yield (permit_id, linked_id, kind) for every parent/child case link.
+
+        kind is "parent" or "child". No records are validated.
+        """
+        yield from self.conn.execute(
+            "SELECT permit_id, linked_id, kind FROM links ORDER BY offset, rowid"
+        )
+
+    def close(self) -> None:
+        self._file.close()
+        self.conn.close()
+
+    def __enter__(self) -> "PermitStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
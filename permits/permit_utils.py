@@ -1,23 +1,51 @@
 """Shared utilities for permit analysis."""
 
+import functools
 import json
 import re
+from collections.abc import Iterable, Mapping
+from datetime import datetime
 from pathlib import Path
 
 from models import Permit
 
+# json_loads is re-exported for permit_store and fetch_permits
+try:
+    # orjson is optional; it speeds up scans that only need a few fields
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads  # noqa: F401
+
 
 def load_permits(jsonl_path: Path) -> dict[str, Permit]:
     """Load permits from JSONL file into a dict keyed by permit_id."""
     permits = {}
-    with open(jsonl_path) as f:
+    with open(jsonl_path, "rb") as f:
         for line in f:
-            data = json.loads(line)
-            permit = Permit.model_validate(data)
+            if not line.strip():
+                continue
+            # Validate straight from JSON bytes, without building dicts first
+            permit = Permit.model_validate_json(line)
             permits[permit.permit_id] = permit
+    canonicalize_links(permits)
     return permits
 
 
+@functools.lru_cache(maxsize=1 << 16)
+def parse_date(date_str: str | None) -> datetime | None:
+    """Parse a date string in MM/DD/YYYY format, returning None if invalid.
+
+    Memoized: the same task, payment and creation dates recur across permits
+    and projects.
+    """
+    if not date_str:
+        return None
+    try:
+        return datetime.strptime(date_str.strip(), "%m/%d/%Y")
+    except ValueError:
+        return None
+
+
 def load_parcel_zones(parcels_path: Path) -> dict[str, str]:
     """Load parcel -> zone mapping from JSON file."""
     if not parcels_path.exists():
@@ -26,67 +54,122 @@ def load_parcel_zones(parcels_path: Path) -> dict[str, str]:
         return json.load(f)
 
 
-def normalize_permit_id(pid: str, permits: dict[str, Permit]) -> str | None:
-    """Normalize permit ID to match keys in permits dict.
+def permit_id_candidates(pid: str) -> tuple[str, ...]:
+    """Spellings a case-link ID may refer to, in order of preference.
 
     Handles inconsistent formats like "44910" vs "44910.00".
     """
-    if pid in permits:
-        return pid
-    if pid + ".00" in permits:
-        return pid + ".00"
-    if pid.endswith(".00") and pid[:-3] in permits:
-        return pid[:-3]
-    return None
-
-
-def find_related_permits(
-    start_ids: list[str], permits: dict[str, Permit]
-) -> set[str]:
-    """Find all permits related via parent/child relationships.
-
-    Starting from one or more permit IDs, traverses parent and child
-    links in both directions to find the full set of related permits.
+    if pid.endswith(".00"):
+        return pid, pid + ".00", pid[:-3]
+    return pid, pid + ".00"
+
+
+def build_canonical_ids(permit_ids: Iterable[str]) -> dict[str, str]:
+    """Map every spelling of a known permit ID to the ID it resolves to."""
+    known = set(permit_ids)
+    canonical: dict[str, str] = {}
+    for pid in known:
+        aliases = [pid, pid + ".00"]
+        if pid.endswith(".00"):
+            aliases.append(pid[:-3])
+        for alias in aliases:
+            if alias not in canonical:
+                canonical[alias] = next(c for c in permit_id_candidates(alias) if c in known)
+    return canonical
+
+
+def canonicalize_links(permits: Mapping[str, Permit]) -> None:
+    """Rewrite parent/child case IDs in place to their canonical permit IDs.
+
+    Links to permits that aren't in the dataset are left as they are.
     """
-    visited: set[str] = set()
-    queue = list(start_ids)
+    canonical = build_canonical_ids(permits)
+    for permit in permits.values():
+        for case in (*permit.parent_cases, *permit.child_cases):
+            case.permit_id = canonical.get(case.permit_id, case.permit_id)
+
+
+# Street suffix and direction spellings, folded to their USPS abbreviations
+ADDRESS_ABBREVIATIONS = {
+    "NORTH": "N", "SOUTH": "S", "EAST": "E", "WEST": "W",
+    "NORTHEAST": "NE", "NORTHWEST": "NW", "SOUTHEAST": "SE", "SOUTHWEST": "SW",
+    "STREET": "ST", "AVENUE": "AVE", "AV": "AVE", "ROAD": "RD", "DRIVE": "DR",
+    "LANE": "LN", "COURT": "CT", "PLACE": "PL", "BOULEVARD": "BLVD",
+    "CIRCLE": "CIR", "TERRACE": "TER", "PARKWAY": "PKWY", "HIGHWAY": "HWY",
+    "SQUARE": "SQ", "TRAIL": "TRL", "ALLEY": "ALY",
+}
 
-    while queue:
-        pid = queue.pop()
-        if pid in visited:
-            continue
-        visited.add(pid)
 
-        if pid not in permits:
-            continue
+# Every spelling of each abbreviation, e.g. "ST" -> {"ST", "STREET"}
+ADDRESS_SPELLINGS = {
+    abbr: {abbr, *(word for word, a in ADDRESS_ABBREVIATIONS.items() if a == abbr)}
+    for abbr in ADDRESS_ABBREVIATIONS.values()
+}
 
-        p = permits[pid]
-        for parent in p.parent_cases:
-            norm = normalize_permit_id(parent.permit_id, permits)
-            if norm and norm not in visited:
-                queue.append(norm)
-        for child in p.child_cases:
-            norm = normalize_permit_id(child.permit_id, permits)
-            if norm and norm not in visited:
-                queue.append(norm)
 
-    return visited
+def address_tokens(address: str) -> list[str]:
+    """Split an address into upper-case word tokens with standard abbreviations."""
+    return [ADDRESS_ABBREVIATIONS.get(t, t) for t in re.findall(r"\w+", address.upper())]
+
+
+def query_tokens(query: str, prefix: bool = False) -> list[str]:
+    """Tokens for an address search query.
+
+    With prefix=True the last token may be a partial word ('5TH STR'), so it
+    is left unabbreviated and matched by `token_startswith`.
+    """
+    tokens = address_tokens(query)
+    if prefix and tokens:
+        tokens[-1] = re.findall(r"\w+", query.upper())[-1]
+    return tokens
+
+
+def token_startswith(token: str, prefix: str) -> bool:
+    """Whether any spelling of a normalized token starts with prefix."""
+    return any(s.startswith(prefix) for s in ADDRESS_SPELLINGS.get(token, (token,)))
+
+
+def prefix_abbreviations(prefix: str) -> set[str]:
+    """Abbreviations with a spelling that starts with prefix ('STR' -> {'ST'})."""
+    return {
+        abbr for abbr, spellings in ADDRESS_SPELLINGS.items()
+        if any(s.startswith(prefix) for s in spellings)
+    }
+
+
+def tokens_match(query: list[str], tokens: list[str], prefix: bool = False) -> bool:
+    """Check whether the query tokens appear consecutively in tokens.
+
+    This is word-boundary matching on normalized addresses. With prefix=True
+    the last query token (from `query_tokens`) only needs to start a word,
+    in either its abbreviated or spelled-out form.
+    """
+    n = len(query)
+    if not n:
+        return False
+    for i in range(len(tokens) - n + 1):
+        if tokens[i:i + n - 1] == query[:-1] and (
+            token_startswith(tokens[i + n - 1], query[-1])
+            if prefix else tokens[i + n - 1] == query[-1]
+        ):
+            return True
+    return False
 
 
 def find_permits_by_address(
-    permits: dict[str, Permit], address: str
+    permits: Mapping[str, Permit], address: str, prefix: bool = False
 ) -> list[Permit]:
     """Find permits where address matches at word boundaries.
 
     Uses word boundary matching so '0 5TH ST' matches '0 5TH ST SW'
-    but not '210 5TH ST SW'.
+    but not '210 5TH ST SW'. Street suffixes and directions are compared
+    in abbreviated form, so '5TH STREET' matches '5TH ST'.
     """
-    # Escape regex special chars and match at word boundaries
-    pattern = re.compile(r"\b" + re.escape(address) + r"\b", re.IGNORECASE)
+    query = query_tokens(address, prefix)
     matches = []
     for permit in permits.values():
         for addr in permit.site_addresses:
-            if pattern.search(addr.address):
+            if tokens_match(query, address_tokens(addr.address), prefix):
                 matches.append(permit)
                 break
     return matches
@@ -0,0 +1,86 @@
+"""Adaptive token-bucket rate limiter for the permits portal client.
+
+Installed on an `httpx.AsyncClient` via event hooks, so every request
+(search, permit pages, task comments) draws from the same bucket.
+"""
+
+import asyncio
+import time
+
+import httpx
+
+# Statuses that mean the portal is overloaded and we should back off
+_THROTTLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """Token bucket shared by all requests on a client.
+
+    Tokens refill at `rate` per second up to `burst`. When the portal responds
+    with 429/5xx the rate is halved (down to `min_rate`), at most once per
+    current request interval so a burst of concurrent failures only counts
+    once; each successful response then nudges it back up toward the
+    configured rate (AIMD).
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        min_rate: float = 0.5,
+        recovery: float = 0.05,
+    ) -> None:
+        if burst < 1:
+            raise ValueError(f"burst must be at least 1, got {burst}")
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.burst = burst
+        self.recovery = recovery
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.backed_off = float("-inf")
+        self.throttled = 0
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        """Wait until a token is available, then consume it."""
+        # The lock makes waiters queue in FIFO order instead of racing for tokens
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+    def observe(self, status_code: int) -> None:
+        """Adjust the rate based on a response status."""
+        # Settle tokens earned at the old rate before changing it
+        self._refill()
+        if status_code in _THROTTLE_STATUSES:
+            self.throttled += 1
+            # Responses to requests sent before the last cut are the same overload
+            if self.updated - self.backed_off < 1 / self.rate:
+                return
+            self.backed_off = self.updated
+            self.rate = max(self.min_rate, self.rate / 2)
+            # Drain the bucket so the slowdown takes effect immediately
+            self.tokens = min(self.tokens, 0.0)
+        elif self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.recovery * self.max_rate)
+
+    async def on_request(self, request: httpx.Request) -> None:
+        await self.acquire()
+
+    async def on_response(self, response: httpx.Response) -> None:
+        self.observe(response.status_code)
+
+    def install(self, client: httpx.AsyncClient) -> None:
+        """Register this limiter's hooks on an async client."""
+        client.event_hooks["request"].append(self.on_request)
+        client.event_hooks["response"].append(self.on_response)
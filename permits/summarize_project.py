@@ -13,12 +13,9 @@ import subprocess
 from pathlib import Path
 
 from models import Permit
-from permit_utils import (
-    load_permits,
-    load_parcel_zones,
-    find_permits_by_address,
-    find_related_permits,
-)
+from permit_graph import load_graph
+from permit_store import PermitStore
+from permit_utils import load_parcel_zones
 
 SUMMARY_CACHE_DIR = Path(__file__).parent / "summary_cache"
 
@@ -136,16 +133,16 @@ def main():
     )
     args = parser.parse_args()
 
-    permits = load_permits(args.data)
+    permits = PermitStore(args.data)
     parcel_zones = load_parcel_zones(args.parcels)
-    matches = find_permits_by_address(permits, args.address)
+    matches = permits.find_by_address(args.address)
 
     if not matches:
         print(f"No permits found matching '{args.address}'")
         return 1
 
-    start_ids = [p.permit_id for p in matches]
-    related_ids = find_related_permits(start_ids, permits)
+    graph = load_graph(args.data, permits)
+    related_ids = set().union(*(graph.related(p.permit_id) for p in matches))
     related = [permits[pid] for pid in related_ids if pid in permits]
     related.sort(key=lambda p: p.search_result.date_created)
 
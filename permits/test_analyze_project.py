@@ -0,0 +1,63 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "pydantic",
+#     "pytest",
+#     "python-dateutil",
+# ]
+# ///
+"""Tests for analyze_project.py's date parsing and address lookup."""
+
+import json
+from datetime import datetime
+
+import pytest
+
+from analyze_project import find_permits, parse_date
+from conftest import permit_record
+from permit_store import PermitStore
+
+
+class TestParseDate:
+    @pytest.mark.parametrize("date_str, expected", [
+        ("01/15/2020", datetime(2020, 1, 15)),
+        ("1/5/2020", datetime(2020, 1, 5)),
+        # Formats the strict MM/DD/YYYY parser rejects still parse
+        ("2020-01-15", datetime(2020, 1, 15)),
+        ("01/15/2020 10:30 AM", datetime(2020, 1, 15, 10, 30)),
+        ("Jan 15, 2020", datetime(2020, 1, 15)),
+        ("", None),
+        (None, None),
+        ("not a date", None),
+    ])
+    def test_parse_date(self, date_str, expected):
+        assert parse_date(date_str) == expected
+
+
+class TestFindPermits:
+    ADDRESSES = ["0 5TH ST SW", "210 5TH ST SW", "15TH ST NW", "12 MAIN AVENUE"]
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        path = tmp_path / "permits.jsonl"
+        with open(path, "w") as f:
+            f.writelines(
+                json.dumps(permit_record(f"{i}.00", address=address)) + "\n"
+                for i, address in enumerate(self.ADDRESSES)
+            )
+        with PermitStore(path) as store:
+            yield store
+
+    @pytest.mark.parametrize("query, expected", [
+        # Word matches don't reach into longer words
+        ("5TH ST", ["0 5TH ST SW", "210 5TH ST SW"]),
+        ("0 5TH", ["0 5TH ST SW"]),
+        ("MAIN AVE", ["12 MAIN AVENUE"]),
+        # Nothing at word boundaries: substring match, as before the token index
+        ("AIN AV", ["12 MAIN AVENUE"]),
+        ("th st", ["0 5TH ST SW", "210 5TH ST SW", "15TH ST NW"]),
+        ("10 5T", ["210 5TH ST SW"]),
+        ("ELM", []),
+    ])
+    def test_find_permits(self, store, query, expected):
+        assert [p.search_result.site_address for p in find_permits(store, query)] == expected
@@ -0,0 +1,38 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "pydantic",
+#     "pytest",
+#     "pyyaml",
+#     "shapely",
+# ]
+# ///
+"""Tests for build_site.py's detail shards."""
+
+from build_site import remove_stale_shards, write_detail_shard
+
+
+def build(output_dir, trees: list[str]) -> list[dict]:
+    """Write a shard per project, as one build of data.json would."""
+    return [
+        write_detail_shard({"permit_id": str(i), "permit_tree": tree}, output_dir)
+        for i, tree in enumerate(trees)
+    ]
+
+
+class TestRemoveStaleShards:
+    def test_previous_build_shards_survive_one_build(self, tmp_path):
+        first = build(tmp_path, ["a", "b"])
+        second = build(tmp_path, ["a", "c"])
+        assert remove_stale_shards(tmp_path, second, first) == 0
+        # A page loaded before the second build can still expand project 1
+        assert (tmp_path / first[1]["detail"]).is_file()
+
+        third = build(tmp_path, ["a", "d"])
+        assert remove_stale_shards(tmp_path, third, second) == 1
+        assert not (tmp_path / first[1]["detail"]).exists()
+        assert all((tmp_path / row["detail"]).is_file() for row in second + third)
+
+    def test_rows_from_before_sharding(self, tmp_path):
+        rows = build(tmp_path, ["a"])
+        assert remove_stale_shards(tmp_path, rows, [{"permit_id": "0"}]) == 0
@@ -0,0 +1,68 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "pytest",
+#     "shapely",
+# ]
+# ///
+"""Tests for splitting parcels.geojson into map tiles."""
+
+import json
+
+import pytest
+
+pytest.importorskip("shapely")
+
+from build_tiles import build_tiles, tile_xy, tiles_for_bounds
+
+
+def square(west: float, south: float, size: float) -> dict:
+    east, north = west + size, south + size
+    return {
+        "type": "Polygon",
+        "coordinates": [
+            [[west, south], [east, south], [east, north], [west, north], [west, south]]
+        ],
+    }
+
+
+class TestTileMath:
+    def test_tile_xy(self):
+        assert tile_xy(0, 0, 1) == (1, 1)
+        # Downtown Charlottesville
+        assert tile_xy(-78.4767, 38.0293, 10) == (288, 394)
+        assert tile_xy(-78.4767, 38.0293, 14) == (4620, 6318)
+
+    def test_tile_xy_clamps_to_world(self):
+        assert tile_xy(180, -90, 2) == (3, 3)
+        assert tile_xy(-180, 90, 2) == (0, 0)
+
+    def test_tiles_for_bounds(self):
+        assert tiles_for_bounds((-78.5, 38.0, -78.45, 38.05), 12) == [(1154, 1579), (1155, 1579)]
+
+
+class TestBuildTiles:
+    def test_features_land_in_their_tiles(self, tmp_path):
+        geojson = {
+            "type": "FeatureCollection",
+            "features": [
+                {"type": "Feature", "properties": {"pin": "A"},
+                 "geometry": square(-78.4770, 38.0290, 0.0005)},
+                {"type": "Feature", "properties": {"pin": "B"},
+                 "geometry": square(-78.4990, 38.0290, 0.0005)},
+            ],
+        }
+        tile_keys = build_tiles(geojson, tmp_path, [12], source_sha256="abc")
+        assert tile_keys == {12: ["1154/1579", "1155/1579"]}
+
+        with open(tmp_path / "index.json") as f:
+            index = json.load(f)
+        assert index["source_sha256"] == "abc"
+        assert index["tiles"] == {"12": ["1154/1579", "1155/1579"]}
+
+        pins = {}
+        for key in index["tiles"]["12"]:
+            with open(tmp_path / "12" / f"{key}.json") as f:
+                tile = json.load(f)
+            pins[key] = [index["properties"][feature["id"]]["pin"] for feature in tile["features"]]
+        assert pins == {"1154/1579": ["B"], "1155/1579": ["A"]}
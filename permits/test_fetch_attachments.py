@@ -0,0 +1,89 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "httpx[http2]",
+#     "lxml",
+#     "pydantic",
+#     "pytest",
+#     "python-dotenv",
+#     "tenacity",
+#     "tqdm",
+# ]
+# ///
+"""Tests for resumable attachment downloads."""
+
+import asyncio
+import hashlib
+
+import httpx
+import pytest
+
+from fetch_attachments import UnexpectedPage, download, is_transient_download_error
+from fetch_permits import PortalSession
+
+URL = "https://portal.example/download/abc"
+CONTENT = b"%PDF-1.7 " + bytes(range(256)) * 8
+
+
+def run_download(handler, part_path, **kwargs) -> str:
+    async def go() -> str:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            session = PortalSession(client, "user", "password")
+            return await download(session, URL, part_path, **kwargs)
+
+    return asyncio.run(go())
+
+
+def serve(request: httpx.Request) -> httpx.Response:
+    """Serve CONTENT, honoring Range like the portal does."""
+    range_header = request.headers.get("range")
+    if not range_header:
+        return httpx.Response(200, content=CONTENT)
+    start = int(range_header.removeprefix("bytes=").removesuffix("-"))
+    if start >= len(CONTENT):
+        return httpx.Response(416, headers={"Content-Range": f"bytes */{len(CONTENT)}"})
+    return httpx.Response(206, content=CONTENT[start:])
+
+
+class TestDownload:
+    def test_resumes_partial_file(self, tmp_path):
+        part_path = tmp_path / "a.part"
+        part_path.write_bytes(CONTENT[:100])
+        assert run_download(serve, part_path) == hashlib.sha256(CONTENT).hexdigest()
+        assert part_path.read_bytes() == CONTENT
+
+    def test_complete_part_file(self, tmp_path):
+        part_path = tmp_path / "a.part"
+        part_path.write_bytes(CONTENT)
+        assert run_download(serve, part_path) == hashlib.sha256(CONTENT).hexdigest()
+
+    def test_too_long_part_file_restarts(self, tmp_path):
+        part_path = tmp_path / "a.part"
+        part_path.write_bytes(CONTENT + b"garbage")
+        assert run_download(serve, part_path) == hashlib.sha256(CONTENT).hexdigest()
+        assert part_path.read_bytes() == CONTENT
+
+    def test_html_error_page_is_not_stored(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(download.retry, "sleep", lambda seconds: asyncio.sleep(0))
+        part_path = tmp_path / "a.part"
+
+        def not_found(request):
+            return httpx.Response(
+                200, headers={"Content-Type": "text/html"}, content=b"<h1>Not found</h1>"
+            )
+
+        with pytest.raises(UnexpectedPage):
+            run_download(not_found, part_path)
+        assert not part_path.exists()
+
+    def test_html_attachment(self, tmp_path):
+        page = b"<html><body>Staff report</body></html>"
+
+        def html(request):
+            return httpx.Response(200, headers={"Content-Type": "text/html"}, content=page)
+
+        part_path = tmp_path / "a.part"
+        assert run_download(html, part_path, expect_html=True) == hashlib.sha256(page).hexdigest()
+
+    def test_dropped_connection_is_retried(self):
+        assert is_transient_download_error(httpx.RemoteProtocolError("peer closed connection"))
@@ -0,0 +1,143 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "httpx[http2]",
+#     "lxml",
+#     "pydantic",
+#     "pytest",
+#     "python-dotenv",
+#     "tenacity",
+#     "tqdm",
+# ]
+# ///
+"""Tests for fetch_permits.py sessions and resuming runs after an interruption."""
+
+import asyncio
+import json
+from datetime import date
+from pathlib import Path
+
+import httpx
+import pytest
+
+import fetch_permits
+from conftest import permit_record
+from html_cache import HtmlCache
+from models import Permit, SearchResult
+
+PAGE = Path(__file__).parent / "testdata" / "permit_page.html"
+
+
+class Interrupted(Exception):
+    pass
+
+
+def search_result(permit_id: str) -> SearchResult:
+    return SearchResult(
+        permit_id=permit_id, project_number="", permit_type="", sub_type="", status="",
+        site_address="", parcel_number="", date_created="",
+    )
+
+
+class TestPortalSession:
+    LOGIN_PAGE = b'<form><input name="LoginName"></form>'
+    BROKEN_PAGE = b"<html><body>Something went wrong</body></html>"
+
+    def run_request(self, monkeypatch, pages):
+        """Request a permit page while the portal serves pages in order."""
+        async def login(client, username, password):
+            self.logins.append(username)
+
+        monkeypatch.setattr(fetch_permits, "login", login)
+        self.logins = []
+        responses = iter(pages)
+
+        async def go():
+            transport = httpx.MockTransport(
+                lambda request: httpx.Response(200, content=next(responses))
+            )
+            async with httpx.AsyncClient(transport=transport) as client:
+                session = fetch_permits.PortalSession(client, "user", "password")
+                resp = await session.request(
+                    "GET", fetch_permits.PERMIT_URL,
+                    is_valid=lambda r: fetch_permits.is_permit_page(r.content),
+                )
+                return resp.content
+
+        return asyncio.run(go())
+
+    def test_relogin_on_login_page(self, monkeypatch):
+        page = PAGE.read_bytes()
+        assert self.run_request(monkeypatch, [self.LOGIN_PAGE, page]) == page
+        assert self.logins == ["user"]
+
+    def test_malformed_page_is_not_a_session_expiry(self, monkeypatch):
+        with pytest.raises(ValueError):
+            self.run_request(monkeypatch, [self.BROKEN_PAGE])
+        assert self.logins == []
+
+    def test_relogin_only_once(self, monkeypatch):
+        with pytest.raises(fetch_permits.SessionExpired):
+            self.run_request(monkeypatch, [self.LOGIN_PAGE, self.LOGIN_PAGE])
+
+
+class TestSearchCheckpoint:
+    START, END = date(2024, 1, 1), date(2024, 6, 30)
+
+    def run_search(self, monkeypatch, checkpoint_path, fail_month=None):
+        """Search Jan-Jun, failing every window from fail_month on."""
+        searched = []
+
+        async def search_window(session, start_date, end_date):
+            if fail_month and start_date.month >= fail_month:
+                raise Interrupted
+            searched.append(start_date.month)
+            return [search_result(f"{start_date.month}.00")]
+
+        monkeypatch.setattr(fetch_permits, "search_window", search_window)
+        results = asyncio.run(fetch_permits.search_permits(
+            None, self.START, self.END, concurrency=1, checkpoint_path=checkpoint_path
+        ))
+        return searched, results
+
+    def test_resumes_after_two_interruptions(self, monkeypatch, tmp_path):
+        checkpoint_path = tmp_path / "permits.search.jsonl"
+
+        with pytest.raises(Interrupted):
+            self.run_search(monkeypatch, checkpoint_path, fail_month=3)
+        # Killed mid-write: a torn line follows the completed windows
+        with open(checkpoint_path, "a") as f:
+            f.write('{"start": "2024-03-01", "end": "2024-0')
+
+        with pytest.raises(Interrupted):
+            self.run_search(monkeypatch, checkpoint_path, fail_month=5)
+
+        searched, results = self.run_search(monkeypatch, checkpoint_path)
+        assert searched == [5, 6]
+        assert [r.permit_id for r in results] == [f"{month}.00" for month in range(1, 7)]
+
+
+class TestReparseFromCache:
+    def test_keeps_bad_records_and_drops_torn_line(self, monkeypatch, tmp_path):
+        # The HTML cache is opened relative to the working directory
+        monkeypatch.chdir(tmp_path)
+        cache = HtmlCache(fetch_permits.HTML_CACHE_PATH)
+        cache.put("1.00", PAGE.read_bytes(), fetched_at="2024-04-01T00:00:00+00:00")
+        cache.close()
+
+        output_path = tmp_path / "permits.jsonl"
+        uncached = json.dumps(permit_record("2.00")) + "\n"
+        invalid = '{"permit_id": "3.00"}\n'
+        output_path.write_text(
+            json.dumps(permit_record("1.00")) + "\n" + uncached + invalid + '{"permit_id": "4'
+        )
+
+        fetch_permits.reparse_from_cache(output_path, workers=1)
+
+        lines = output_path.read_text().splitlines(keepends=True)
+        assert len(lines) == 3
+        reparsed = Permit.model_validate_json(lines[0])
+        assert reparsed.info.permit_number == "SP24-00012"
+        assert reparsed.fetched_at == "2024-04-01T00:00:00+00:00"
+        assert lines[1:] == [uncached, invalid]
+        assert not output_path.with_suffix(".jsonl.tmp").exists()
@@ -0,0 +1,76 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "pydantic",
+#     "pytest",
+# ]
+# ///
+"""Tests that FetchQueue gives up on permits that keep failing."""
+
+from contextlib import closing
+
+from fetch_queue import DONE, FAILED, PENDING, FetchQueue
+from models import SearchResult
+
+
+def search_result(permit_id: str) -> SearchResult:
+    return SearchResult(
+        permit_id=permit_id, project_number="", permit_type="", sub_type="", status="",
+        site_address="", parcel_number="", date_created="",
+    )
+
+
+def fail_run(queue: FetchQueue) -> None:
+    """One fetch run in which every queued permit fails."""
+    queue.start_run(set())
+    while (job := queue.claim()) is not None:
+        queue.mark_failed(job[0].permit_id, "ValueError: broken page")
+
+
+class TestMaxAttempts:
+    def test_failed_permit_is_retried_until_max_attempts(self, tmp_path):
+        with closing(FetchQueue(tmp_path / "queue.sqlite", max_attempts=3)) as queue:
+            queue.enqueue([search_result("1.00")])
+            for _ in range(5):
+                fail_run(queue)
+                # The search still finds the permit on every run
+                queue.enqueue([search_result("1.00")])
+            queue.start_run(set())
+            assert queue.pending_count() == 0
+            assert queue.failures() == [("1.00", 3, "ValueError: broken page")]
+            assert queue.exhausted_count() == 1
+
+    def test_raising_max_attempts_retries(self, tmp_path):
+        path = tmp_path / "queue.sqlite"
+        with closing(FetchQueue(path, max_attempts=1)) as queue:
+            queue.enqueue([search_result("1.00")])
+            fail_run(queue)
+        with closing(FetchQueue(path, max_attempts=2)) as queue:
+            queue.start_run(set())
+            assert queue.counts() == {PENDING: 1}
+
+    def test_interrupted_attempts_count(self, tmp_path):
+        with closing(FetchQueue(tmp_path / "queue.sqlite", max_attempts=2)) as queue:
+            queue.enqueue([search_result("1.00")])
+            for _ in range(2):
+                # Killed mid-fetch, e.g. by a page that crashes the parser
+                queue.start_run(set())
+                assert queue.claim() is not None
+            queue.start_run(set())
+            assert queue.counts() == {FAILED: 1}
+
+    def test_success_resets_attempts(self, tmp_path):
+        with closing(FetchQueue(tmp_path / "queue.sqlite", max_attempts=2)) as queue:
+            queue.enqueue([search_result("1.00")])
+            fail_run(queue)
+            queue.start_run(set())
+            queue.claim()
+            queue.mark_done("1.00")
+            # Refreshed later: a fresh set of attempts
+            queue.enqueue([search_result("1.00")], use_cache=False)
+            fail_run(queue)
+            queue.start_run(set())
+            assert queue.counts() == {PENDING: 1}
+            queue.claim()
+            queue.mark_done("1.00")
+            assert queue.counts() == {DONE: 1}
@@ -0,0 +1,181 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "pandas",
+#     "pydantic",
+#     "pytest",
+#     "pyyaml",
+# ]
+# ///
+"""Tests that the pandas engine matches find_developments exactly."""
+
+import random
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from conftest import permit_record  # noqa: E402
+from developments_frame import find_developments_frame, frames_from_permits  # noqa: E402
+from models import Permit  # noqa: E402
+from permit_graph import PermitGraph  # noqa: E402
+from permit_utils import canonicalize_links  # noqa: E402
+from top_developments import find_developments  # noqa: E402
+
+PERMIT_KINDS = [
+    ("Site Plan", "Major"),
+    ("Planning", "Rezoning"),
+    ("Planning", "Development Plan Review - Major"),
+    ("Planning", "Special Use"),
+    ("Building", "Residential"),
+]
+STATUSES = ["APPROVED", "REVIEW", "VOID", "UNDERCONST", "APPLIED", "EXPIRED"]
+UNIT_FIELDS = ["Number of Residential Units", "# of Units", "Number of Units"]
+
+
+def make_permit(
+    permit_id: str,
+    permit_type: str = "Site Plan",
+    sub_type: str = "Major",
+    status: str = "APPROVED",
+    address: str = "100 MAIN ST",
+    parcel: str = "100010000",
+    date: str = "01/15/2020",
+    units: int | None = None,
+    details: list[tuple[str, str]] = (),
+    **kwargs,
+) -> Permit:
+    all_details = [("Number of Units", str(units))] if units is not None else []
+    all_details += list(details)
+    return Permit.model_validate(permit_record(
+        permit_id, permit_type, sub_type, status, address, parcel, date,
+        details=all_details, **kwargs,
+    ))
+
+
+def random_permits(seed: int, projects: int = 150) -> dict[str, Permit]:
+    """Projects of linked permits with messy IDs, dates, units and statuses."""
+    rng = random.Random(seed)
+    permits: dict[str, Permit] = {}
+    n = 0
+
+    def random_date() -> str:
+        if rng.random() < 0.05:
+            return rng.choice(["", "not a date"])
+        return f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/{rng.randint(2015, 2025)}"
+
+    for _ in range(projects):
+        address = f"{rng.randint(1, 999)} {rng.choice(['MAIN', 'WEST', 'ELM', '5TH'])} ST"
+        if rng.random() < 0.1:
+            address = rng.choice(["", "MAIN ST"])
+        parcel = f"{rng.randint(100, 160)}0{rng.randint(10, 99)}000" if rng.random() < 0.85 else ""
+        ids: list[str] = []
+        links: dict[str, dict[str, list[str]]] = {}
+        for _ in range(rng.randint(1, 5)):
+            n += 1
+            pid = f"{10000 + n}.00" if rng.random() < 0.8 else str(10000 + n)
+            ids.append(pid)
+            links[pid] = {"parents": [], "children": []}
+        for i in range(1, len(ids)):
+            parent, child = rng.choice(ids[:i]), ids[i]
+            # Linked IDs drop the ".00" suffix some of the time
+            links[child]["parents"].append(
+                parent.removesuffix(".00") if rng.random() < 0.3 else parent
+            )
+            links[parent]["children"].append(
+                child.removesuffix(".00") if rng.random() < 0.3 else child
+            )
+        if rng.random() < 0.1:
+            links[ids[0]]["children"].append("99999")
+
+        for pid in ids:
+            permit_type, sub_type = rng.choice(PERMIT_KINDS)
+            date = random_date()
+            details = [
+                ("Type", rng.choice(["Residential", "Commercial", "Mixed Use", ""])),
+                ("Description of Work", rng.choice(
+                    ["new apartment building", "townhouse development", "retail", ""]
+                )),
+            ]
+            units = rng.choice([None, None, 0, 4, 12, 50, 120, 300])
+            if units is not None:
+                details.insert(0, (rng.choice(UNIT_FIELDS), str(units)))
+            if rng.random() < 0.2:
+                details.append(("Commercial Square Footage", str(rng.randint(0, 5000))))
+            tasks = [("Intake Application", "", random_date())]
+            if rng.random() < 0.4:
+                tasks.append(("Final Approval", rng.choice(["YES_APPR", "APPROVED", "DENIED"]),
+                              random_date()))
+            if rng.random() < 0.2:
+                tasks.append(("Final Site Plan Approved", "Approved", random_date()))
+            permits[pid] = make_permit(
+                pid,
+                permit_type,
+                sub_type,
+                rng.choice(STATUSES),
+                address,
+                parcel,
+                date,
+                details=details,
+                tasks=tasks,
+                payments=[random_date() for _ in range(rng.randint(0, 2))],
+                **links[pid],
+            )
+    canonicalize_links(permits)
+    return permits
+
+
+def run_both(permits, parcel_zones, min_units=None, include_without_units=False):
+    graph = PermitGraph.from_permits(permits)
+    expected = find_developments(permits, parcel_zones, min_units, include_without_units, graph)
+    actual = find_developments_frame(
+        frames_from_permits(permits), parcel_zones, min_units, include_without_units, graph
+    )
+    return expected, actual
+
+
+class TestFindDevelopmentsFrame:
+    """find_developments_frame() returns exactly what find_developments() does."""
+
+    @pytest.mark.parametrize("seed", [1, 2, 3])
+    @pytest.mark.parametrize("min_units", [None, 50])
+    @pytest.mark.parametrize("include_without_units", [False, True])
+    def test_random_permits(self, seed, min_units, include_without_units):
+        permits = random_permits(seed)
+        rng = random.Random(seed)
+        parcels = sorted({p.search_result.parcel_number for p in permits.values()})
+        parcel_zones = {
+            parcel: rng.choice(["R-1", "RX-5", "CX-8", "NX-10"])
+            for parcel in parcels if parcel and rng.random() < 0.7
+        }
+        expected, actual = run_both(permits, parcel_zones, min_units, include_without_units)
+        assert expected
+        assert actual == expected
+
+    def test_no_candidates(self):
+        permits = {"1.00": make_permit("1.00", units=None)}
+        assert run_both(permits, {}) == ([], [])
+
+    def test_void_duplicate_is_dropped(self):
+        permits = {
+            "1.00": make_permit("1.00", status="VOID", units=200),
+            "2.00": make_permit("2.00", status="APPLIED", units=100),
+        }
+        expected, actual = run_both(permits, {})
+        assert [p["permit_id"] for p in expected] == ["2.00"]
+        assert actual == expected
+
+    def test_linked_permits_share_project(self):
+        permits = {
+            "1.00": make_permit("1.00", "Planning", "Rezoning", date="03/01/2018",
+                                children=["2"]),
+            "2.00": make_permit("2.00", units=40, date="06/01/2019", parents=["1"],
+                                tasks=[("Final Approval", "YES_APPR", "01/02/2020")]),
+        }
+        canonicalize_links(permits)
+        expected, actual = run_both(permits, {"100010000": "R-1"})
+        assert actual == expected
+        [project] = actual
+        assert project["permit_count"] == 2
+        assert project["zone"] == "R-1"
+        assert project["initial_submit"].year == 2018
@@ -0,0 +1,102 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "httpx[http2]",
+#     "lxml",
+#     "pydantic",
+#     "pytest",
+#     "python-dotenv",
+#     "tenacity",
+#     "tqdm",
+# ]
+# ///
+"""Tests for parsing a saved permit page (testdata/permit_page.html)."""
+
+from pathlib import Path
+
+import pytest
+
+from fetch_permits import parse_permit
+from models import SearchResult
+
+PAGE = Path(__file__).parent / "testdata" / "permit_page.html"
+
+SEARCH_RESULT = SearchResult(
+    permit_id="12345.00",
+    project_number="SP24-00012",
+    permit_type="Site Plan",
+    sub_type="Major",
+    status="APPROVED",
+    site_address="210 5TH ST SW",
+    parcel_number="290145000",
+    date_created="01/05/2024",
+)
+
+
+@pytest.fixture(scope="module")
+def permit():
+    return parse_permit(PAGE.read_bytes(), SEARCH_RESULT, "2024-04-01T00:00:00+00:00")
+
+
+class TestParsePermit:
+    def test_info(self, permit):
+        info = permit.info
+        assert info.permit_number == "SP24-00012"
+        assert info.location == "210 5TH ST SW"
+        assert info.permit_type == "Site Plan - Major"
+        assert info.status == "APPROVED"
+        assert info.date_issued is None
+        assert info.case_type == "Site Plan"
+        assert (info.case_type_id, info.sub_type_id) == ("1042", "2187")
+
+    def test_case_links(self, permit):
+        assert [(c.permit_id, c.project_number) for c in permit.parent_cases] == [
+            ("11111.00", "PLZ23-00004"),
+        ]
+        assert [(c.permit_id, c.project_number) for c in permit.child_cases] == [
+            ("22222", "BLD24-00101"),
+            ("22223.00", "BLD24-00102"),
+        ]
+
+    def test_tables(self, permit):
+        assert [(a.address, a.suite, a.parcel_id) for a in permit.site_addresses] == [
+            ("210 5TH ST SW", "", "290145000"),
+            ("212 5TH ST SW", "B", "290146000"),
+        ]
+        assert [(c.name, c.role) for c in permit.contacts] == [
+            ("Jane Applicant", "Applicant"),
+            ("Acme Holdings LLC", "Owner"),
+        ]
+        assert [c.business_name for c in permit.contractors] == ["Main Street Builders"]
+        # Only the panel's first table is read
+        assert [(d.description, d.data) for d in permit.details] == [
+            ("Number of Residential Units", "48"),
+            ("Description of Work", "New apartment building"),
+        ]
+        assert [i.status for i in permit.inspections] == ["Passed"]
+        assert [c.description for c in permit.conditions] == ["Landscaping bond"]
+        assert permit.flags == []
+        assert permit.notes == ["Resubmittal received"]
+        assert [(f.amount, f.balance_due) for f in permit.fees] == [("$1,800.00", "$0.00")]
+        assert [(p.payment_date, p.reference) for p in permit.payments] == [
+            ("01/06/2024", "REC-5521"),
+        ]
+
+    def test_tasks(self, permit):
+        assert [(t.description, t.result, t.date_completed, t.task_id) for t in permit.tasks] == [
+            ("Intake Application", "Complete", "01/05/2024", "9f8e7d6c-0001"),
+            ("Final Approval", "YES_APPR", "03/18/2024", None),
+        ]
+        assert all(t.comments == [] for t in permit.tasks)
+
+    def test_attachments(self, permit):
+        assert [(a.attachment_type, a.filename, a.date) for a in permit.attachments] == [
+            ("Site Plan", "final_site_plan.pdf", "03/18/2024"),
+            ("Correspondence", "comment_letter.pdf", "02/01/2024"),
+        ]
+        assert permit.attachments[0].download_url.endswith("/download/abc123")
+
+    def test_page_without_case_panel(self):
+        with pytest.raises(ValueError, match="casePanel"):
+            parse_permit(b"<html><body><form id='login'></form></body></html>",
+                         SEARCH_RESULT, "")
@@ -0,0 +1,95 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "pydantic",
+#     "pytest",
+# ]
+# ///
+"""Tests that PermitStore keeps its index in step with permits.jsonl."""
+
+import json
+
+import pytest
+
+from conftest import permit_record
+from permit_store import PermitStore
+from permit_utils import find_permits_by_address
+
+
+def permit_line(permit_id: str, address: str = "100 MAIN ST") -> str:
+    return json.dumps(permit_record(permit_id, address=address)) + "\n"
+
+
+def write_permits(path, permit_ids, mode="w"):
+    with open(path, mode) as f:
+        f.writelines(permit_line(pid, f"{i} MAIN ST") for i, pid in enumerate(permit_ids))
+
+
+class TestRefresh:
+    def test_append_is_indexed_incrementally(self, tmp_path):
+        path = tmp_path / "permits.jsonl"
+        write_permits(path, ["1.00", "2.00"])
+        with PermitStore(path) as store:
+            assert list(store) == ["1.00", "2.00"]
+            write_permits(path, ["3.00"], mode="a")
+            store.refresh()
+            assert list(store) == ["1.00", "2.00", "3.00"]
+            assert store["3.00"].permit_id == "3.00"
+
+    def test_rewrite_in_place_is_reindexed(self, tmp_path):
+        path = tmp_path / "permits.jsonl"
+        write_permits(path, [f"{n}.00" for n in range(50)])
+        PermitStore(path).close()
+
+        # Same inode, larger file, but not an append of the indexed records
+        write_permits(path, [f"{n}.00" for n in range(1000, 1080)])
+        with PermitStore(path) as store:
+            assert len(store) == 80
+            assert "1.00" not in store
+            assert store["1079.00"].permit_id == "1079.00"
+
+    def test_same_size_rewrite_is_reindexed(self, tmp_path):
+        path = tmp_path / "permits.jsonl"
+        write_permits(path, ["1.00", "2.00"])
+        PermitStore(path).close()
+
+        write_permits(path, ["3.00", "4.00"])
+        with PermitStore(path) as store:
+            assert list(store) == ["3.00", "4.00"]
+
+
+class TestAddressSearch:
+    ADDRESSES = [
+        "0 5TH ST SW", "210 5TH STREET SW", "12 MAIN AVENUE", "40 ELM DR", "7 EAST MARKET ST",
+    ]
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        path = tmp_path / "permits.jsonl"
+        with open(path, "w") as f:
+            f.writelines(
+                permit_line(f"{i}.00", address) for i, address in enumerate(self.ADDRESSES)
+            )
+        with PermitStore(path) as store:
+            yield store
+
+    @pytest.mark.parametrize("query, expected", [
+        ("5TH STR", ["0 5TH ST SW", "210 5TH STREET SW"]),
+        ("5TH STRE", ["0 5TH ST SW", "210 5TH STREET SW"]),
+        ("5TH ST", ["0 5TH ST SW", "210 5TH STREET SW"]),
+        ("MAIN AVEN", ["12 MAIN AVENUE"]),
+        ("MAIN AV", ["12 MAIN AVENUE"]),
+        ("ELM DRI", ["40 ELM DR"]),
+        ("EAS", ["7 EAST MARKET ST"]),
+        ("EAST", ["7 EAST MARKET ST"]),
+        ("0 5TH", ["0 5TH ST SW"]),
+        ("5TH STX", []),
+    ])
+    def test_partial_last_word(self, store, query, expected):
+        assert store.match_addresses(query, prefix=True) == expected
+        found = find_permits_by_address(dict(store.items()), query, prefix=True)
+        assert sorted(p.search_result.site_address for p in found) == expected
+
+    def test_exact_folds_abbreviations(self, store):
+        assert store.match_addresses("5TH STREET SW") == ["0 5TH ST SW", "210 5TH STREET SW"]
+        assert store.match_addresses("5TH STR") == []
@@ -2,6 +2,8 @@
 # /// script
 # requires-python = ">=3.12"
 # dependencies = [
+#     "pandas",
+#     "pyarrow",
 #     "pydantic",
 #     "pyyaml",
 # ]
@@ -14,13 +16,15 @@ import re
 import sys
 from collections import defaultdict
 from datetime import datetime
+from functools import cached_property
 from pathlib import Path
 from typing import Any
 
 import yaml
 
 from models import Permit
-from permit_utils import load_permits, load_parcel_zones, find_related_permits
+from permit_graph import PermitGraph, load_graph
+from permit_utils import load_permits, load_parcel_zones, parse_date
 
 # Permit types/subtypes that count for zoning code determination
 # (Site plans, development plans, rezonings - not minor permits like HVAC)
@@ -47,14 +51,28 @@ APPROVAL_CUTOFF = datetime(2024, 2, 19)
 # Projects submitted before this date proceed under 2003 code
 SUBMISSION_CUTOFF = datetime(2023, 12, 18)
 
-
-def parse_date(date_str: str | None) -> datetime | None:
-    if not date_str:
-        return None
-    try:
-        return datetime.strptime(date_str.strip(), "%m/%d/%Y")
-    except ValueError:
-        return None
+# Task results that count as approval
+FINAL_APPROVAL_RESULTS = ("YES_APPR", "YES", "APPROVED", "APPRV_PC")
+SITE_PLAN_APPROVAL_RESULTS = ("YES_APPR", "YES", "APPROVED")
+
+# Status priority for deduplication (higher = better)
+STATUS_PRIORITY = {
+    "APPROVED": 100,
+    "APPROVEDCL": 100,
+    "UNDERCONST": 90,
+    "PLANCOMM": 80,
+    "REVIEW": 70,
+    "RESUBMIT": 60,
+    "COMMENTS": 50,
+    "APPLIED": 40,
+    "DEFERRED": 30,
+    "EXPIRED": 20,
+    "REJECTED": 10,
+    "WITHDRAWN": 10,
+    "DENIED": 10,
+    "CLOSED": 10,
+    "VOID": 0,
+}
 
 
 def get_project_type(permit: Permit) -> str:
@@ -74,6 +92,13 @@ def get_project_type(permit: Permit) -> str:
         if d.description == "Description of Work":
             description = d.data.lower()
 
+    return classify_project_type(type_field, has_commercial_sf, description)
+
+
+def classify_project_type(
+    type_field: str | None, has_commercial_sf: bool, description: str
+) -> str:
+    """Classify a project from its lower-cased Type and Description of Work details."""
     # Check for conversions first
     if "into an apartment" in description or "into apartment" in description:
         return "Conversion"
@@ -185,19 +210,13 @@ def get_submission_date(permit: Permit) -> datetime | None:
 def get_approval_date(permit: Permit) -> datetime | None:
     """Extract approval date from permit tasks."""
     for task in permit.tasks:
-        if "Final Approval" in task.description and task.result in (
-            "YES_APPR",
-            "YES",
-            "APPROVED",
-            "APPRV_PC",
-        ):
+        if "Final Approval" in task.description and task.result in FINAL_APPROVAL_RESULTS:
             return parse_date(task.date_completed)
     # Also check "Final Site Plan Approved?" task
     for task in permit.tasks:
-        if "Final Site Plan Approved" in task.description and task.result in (
-            "YES_APPR",
-            "YES",
-            "APPROVED",
+        if (
+            "Final Site Plan Approved" in task.description
+            and task.result in SITE_PLAN_APPROVAL_RESULTS
         ):
             return parse_date(task.date_completed)
     return None
@@ -222,18 +241,19 @@ def get_zoning_code(
     approved_permit_id: str | None = None
 
     for permit in related_permits:
-        if not is_qualifying_permit(permit):
+        fields = derived_fields(permit)
+        if not fields.qualifying:
             continue
 
         # Track submission date (from tasks, not date_created which is often wrong)
-        submitted = get_submission_date(permit)
+        submitted = fields.submission_date
         if submitted:
             if earliest_submitted is None or submitted < earliest_submitted:
                 earliest_submitted = submitted
                 submitted_permit_id = permit.permit_id
 
         # Track approval date
-        approved = get_approval_date(permit)
+        approved = fields.approval_date
         if approved:
             if earliest_approved is None or approved < earliest_approved:
                 earliest_approved = approved
@@ -291,21 +311,70 @@ def get_unit_count(permit: Permit) -> int | None:
     return None
 
 
+class DerivedFields:
+    """Lazily computed, cached fields derived from a permit."""
+
+    def __init__(self, permit: Permit) -> None:
+        self.permit = permit
+
+    @cached_property
+    def unit_count(self) -> int | None:
+        return get_unit_count(self.permit)
+
+    @cached_property
+    def project_type(self) -> str:
+        return get_project_type(self.permit)
+
+    @cached_property
+    def qualifying(self) -> bool:
+        return is_qualifying_permit(self.permit)
+
+    @cached_property
+    def submission_date(self) -> datetime | None:
+        return get_submission_date(self.permit)
+
+    @cached_property
+    def approval_date(self) -> datetime | None:
+        return get_approval_date(self.permit)
+
+    @cached_property
+    def last_activity(self) -> datetime | None:
+        """Latest task or payment date."""
+        dates = [parse_date(task.date_completed) for task in self.permit.tasks]
+        dates += [parse_date(payment.payment_date) for payment in self.permit.payments]
+        return max((dt for dt in dates if dt), default=None)
+
+
+def derived_fields(permit: Permit) -> DerivedFields:
+    """Return the permit's derived fields, cached on the permit itself.
+
+    A permit can belong to many projects, so each field is computed at most
+    once per permit.
+    """
+    if permit._derived is None:
+        permit._derived = DerivedFields(permit)
+    return permit._derived
+
+
 def find_developments(
     permits: dict[str, Permit],
     parcel_zones: dict[str, str],
     min_units: int | None = None,
     include_without_units: bool = False,
+    graph: PermitGraph | None = None,
 ) -> list[dict[str, Any]]:
     """Find all developments with unit counts above threshold.
 
     If include_without_units is True, also includes Site Plans and
     Major Development Plans that don't have unit counts specified.
     """
+    if graph is None:
+        graph = PermitGraph.from_permits(permits)
     projects: list[dict[str, Any]] = []
 
     for p in permits.values():
-        units = get_unit_count(p)
+        fields = derived_fields(p)
+        units = fields.unit_count
 
         # Decide whether to include this permit.
         #
@@ -320,12 +389,13 @@ def find_developments(
             if min_units is not None and units < min_units:
                 continue
         elif include_without_units and should_include_without_units(p):
-            if get_project_type(p) == "?":
+            if fields.project_type == "?":
                 continue  # Skip permits without enough metadata to determine type
         else:
             continue
 
-        related_ids = find_related_permits([p.permit_id], permits)
+        # Sorted so ties (e.g. equal submission dates) resolve the same way every run
+        related_ids = sorted(graph.related(p.permit_id))
         related = [permits[pid] for pid in related_ids if pid in permits]
 
         addrs: set[str] = set()
@@ -338,22 +408,16 @@ def find_developments(
                 addrs.add(a.address)
             if rp.search_result.parcel_number:
                 parcels.add(rp.search_result.parcel_number)
+            rp_fields = derived_fields(rp)
             # Get submission date using our improved logic
-            sub_dt = get_submission_date(rp)
-            if sub_dt:
-                submit_dates.append(sub_dt)
+            if rp_fields.submission_date:
+                submit_dates.append(rp_fields.submission_date)
             # For last updated, use most recent task, payment, or intake date
-            for task in rp.tasks:
-                dt = parse_date(task.date_completed)
-                if dt:
-                    update_dates.append(dt)
-            for payment in rp.payments:
-                dt = parse_date(payment.payment_date)
-                if dt:
-                    update_dates.append(dt)
+            if rp_fields.last_activity:
+                update_dates.append(rp_fields.last_activity)
 
         zone = "?"
-        for parcel in parcels:
+        for parcel in sorted(parcels):
             if parcel in parcel_zones:
                 zone = parcel_zones[parcel]
                 break
@@ -370,7 +434,7 @@ def find_developments(
                 "units": units,
                 "permit_id": p.permit_id,
                 "project_number": p.project_number,
-                "use_type": get_project_type(p),
+                "use_type": fields.project_type,
                 "status": p.search_result.status,
                 "addresses": all_addrs,
                 "parcels": sorted(parcels) if parcels else [],
@@ -396,25 +460,6 @@ def find_developments(
             key = proj["permit_id"]
         by_key[key].append(proj)
 
-    # Status priority for deduplication (higher = better)
-    status_priority = {
-        "APPROVED": 100,
-        "APPROVEDCL": 100,
-        "UNDERCONST": 90,
-        "PLANCOMM": 80,
-        "REVIEW": 70,
-        "RESUBMIT": 60,
-        "COMMENTS": 50,
-        "APPLIED": 40,
-        "DEFERRED": 30,
-        "EXPIRED": 20,
-        "REJECTED": 10,
-        "WITHDRAWN": 10,
-        "DENIED": 10,
-        "CLOSED": 10,
-        "VOID": 0,
-    }
-
     deduped = []
     for projs in by_key.values():
         # Prefer non-VOID permits, then best status, then highest unit count
@@ -423,7 +468,7 @@ def find_developments(
         best = max(
             candidates,
             key=lambda x: (
-                status_priority.get(x["status"], 25),
+                STATUS_PRIORITY.get(x["status"], 25),
                 x["units"] or 0,
             ),
         )
@@ -598,17 +643,53 @@ def main() -> int:
         action="store_true",
         help="Include Site Plans and Major Development Plans even without unit counts",
     )
+    parser.add_argument(
+        "--engine",
+        choices=["python", "pandas"],
+        default="python",
+        help="Compute developments per permit (python) or with grouped tables (pandas)",
+    )
+    parser.add_argument(
+        "--parquet",
+        type=Path,
+        default=None,
+        help="Read tables from export_parquet.py output instead of --data (pandas engine)",
+    )
     args = parser.parse_args()
 
-    if not args.data.exists():
+    if args.parquet:
+        args.engine = "pandas"
+        if not args.parquet.is_dir():
+            print(f"Error: Parquet directory not found: {args.parquet}")
+            return 1
+    elif not args.data.exists():
         print(f"Error: Data file not found: {args.data}")
         return 1
 
-    permits = load_permits(args.data)
     parcel_zones = load_parcel_zones(args.parcels)
-    projects = find_developments(
-        permits, parcel_zones, args.min_units, args.include_without_units
-    )
+    if args.engine == "pandas":
+        from developments_frame import (
+            find_developments_frame,
+            frames_from_parquet,
+            frames_from_permits,
+        )
+
+        if args.parquet:
+            frames = frames_from_parquet(args.parquet)
+            graph = None
+        else:
+            permits = load_permits(args.data)
+            frames = frames_from_permits(permits)
+            graph = load_graph(args.data, permits)
+        projects = find_developments_frame(
+            frames, parcel_zones, args.min_units, args.include_without_units, graph
+        )
+    else:
+        permits = load_permits(args.data)
+        graph = load_graph(args.data, permits)
+        projects = find_developments(
+            permits, parcel_zones, args.min_units, args.include_without_units, graph
+        )
 
     if args.overrides:
         overrides = load_overrides(args.overrides)